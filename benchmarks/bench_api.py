@@ -0,0 +1,142 @@
+# benchmarks/bench_api.py
+"""
+Load test for the scoring API: latency percentiles and throughput.
+
+    python benchmarks/bench_api.py [requests] [concurrency]
+    python benchmarks/bench_api.py 2000 8 --url http://127.0.0.1:8000
+
+Without --url the app is driven in-process through its ASGI interface,
+so the figures are the app's own request path (routing, parsing,
+validation, scoring, serialisation) without a network or server in
+between. With --url a running server (uvicorn api:app) is hit over HTTP
+from a thread pool.
+
+Payloads are real rows of the processed CSV. Reported per endpoint:
+p50 / p90 / p99 latency and requests per second.
+"""
+import asyncio
+import json
+import os
+import pathlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")      # per-request INFO lines would dominate the timings
+
+DATA  = ROOT / "data" / "Caregiver Prediction - Processed_Data.csv"
+QUERY = "as_of=2026-10-19"
+BATCH = 100
+FIELDS = ["caregiver_id", "tenure_days", "age", "waiting_days", "total_leave_days",
+          "days_worked_2025", "work_ratio_2025", "rank", "competency_score",
+          "positive_feedback", "incidents", "avg_income_per_shift", "salary_band",
+          "age_band", "current_status", "home_province"]
+
+
+def payloads(n: int) -> list:
+    df = pd.read_csv(DATA).dropna(subset=FIELDS)
+    df = df.assign(current_status=df.get("current_status", "active"))[FIELDS]
+    for col in ["tenure_days", "age", "waiting_days", "total_leave_days", "rank",
+                "positive_feedback", "incidents"]:
+        df[col] = df[col].astype(int)
+    rows = df.to_dict(orient="records")
+    return [rows[i % len(rows)] for i in range(n)]
+
+
+# ------------------------------------------------------------------
+# In-process: call the ASGI app directly
+async def _asgi_post(app, path: str, body: bytes) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": QUERY.encode(), "root_path": "",
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def run_inprocess(path: str, bodies: list, concurrency: int) -> tuple:
+    from api import app
+
+    async def main():
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(body):
+            async with gate:
+                t0 = time.perf_counter()
+                status = await _asgi_post(app, path, body)
+                latencies.append(time.perf_counter() - t0)
+                if status != 200:
+                    raise RuntimeError(f"{path} answered {status}")
+
+        await one(bodies[0])                                   # warm-up: models load here
+        latencies.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(b) for b in bodies))
+        return np.array(latencies), time.perf_counter() - t0
+
+    return asyncio.run(main())
+
+
+# ------------------------------------------------------------------
+# Over HTTP against a running server
+def run_http(url: str, path: str, bodies: list, concurrency: int) -> tuple:
+    import requests
+    session = requests.Session()
+    headers = {"content-type": "application/json"}
+
+    def one(body):
+        t0 = time.perf_counter()
+        session.post(f"{url}{path}?{QUERY}", data=body, headers=headers).raise_for_status()
+        return time.perf_counter() - t0
+
+    one(bodies[0])
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = np.array(list(pool.map(one, bodies)))
+    return latencies, time.perf_counter() - t0
+
+
+def report(label: str, latencies: np.ndarray, seconds: float) -> None:
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+    print(f"{label:<16} {len(latencies):6d}  {p50:8.2f} {p90:8.2f} {p99:8.2f}  {len(latencies) / seconds:9.1f}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    url = sys.argv[sys.argv.index("--url") + 1] if "--url" in sys.argv else None
+    if url in args:
+        args.remove(url)
+    n = int(args[0]) if args else 1000
+    concurrency = int(args[1]) if len(args) > 1 else 8
+
+    rows = payloads(n)
+    single = [json.dumps(r).encode() for r in rows]
+    batches = [json.dumps(rows[i:i + BATCH]).encode() for i in range(0, n, BATCH)]
+
+    run = (lambda p, b: run_http(url, p, b, concurrency)) if url else \
+          (lambda p, b: run_inprocess(p, b, concurrency))
+    print(f"{url or 'in-process ASGI'}, concurrency {concurrency}\n")
+    print(f"{'endpoint':<16} {'reqs':>6}  {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}  {'req/s':>9}")
+    report("/predict", *run("/predict", single))
+    report("/predict/batch", *run("/predict/batch", batches))
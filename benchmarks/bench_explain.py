@@ -0,0 +1,48 @@
+# benchmarks/bench_explain.py
+"""
+Cost of the risk-driver explanations on top of batch scoring.
+
+    python benchmarks/bench_explain.py [rows]
+
+Scores the processed CSV (repeated up to `rows` rows) with and without
+churn_drivers / tenure_drivers, using the models in models/.
+"""
+import logging
+import pathlib
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from score import score_df_raw                  # noqa: E402
+from postprocess import risk_levels             # noqa: E402
+
+logging.getLogger("wecare").setLevel(logging.WARNING)
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    src = pd.read_csv(ROOT / "data" / "Caregiver Prediction - Processed_Data.csv")
+    df = src.iloc[np.arange(rows) % len(src)].reset_index(drop=True)
+
+    raw = score_df_raw(df)
+    explained = int((risk_levels(raw["churn_prob"]) != "LOW").sum())
+    print(f"{rows} rows, {explained} HIGH/MEDIUM explained")
+
+    plain = best_of(lambda: score_df_raw(df, explain_risk=False))
+    full  = best_of(lambda: score_df_raw(df, explain_risk=True))
+    print(f"scoring only        {plain:6.2f} s")
+    print(f"scoring + drivers   {full:6.2f} s   (+{(full - plain) / plain:.0%})")
@@ -0,0 +1,57 @@
+# benchmarks/bench_history.py
+"""
+Query latency of the prediction history after years of daily runs.
+
+    python benchmarks/bench_history.py [days] [caregivers]
+
+Records `days` synthetic daily runs of `caregivers` rows into a temporary
+database, then times per-caregiver trajectories and roster trends.
+"""
+import datetime as dt
+import pathlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from history import record_run, trajectory, trend      # noqa: E402
+from postprocess import finalize                        # noqa: E402
+
+
+def timed(label: str, fn, repeat: int = 20):
+    fn()                                                # warm the page cache
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    ms = (time.perf_counter() - t0) / repeat * 1000
+    print(f"{label:<28} {ms:8.2f} ms   ({len(out)} rows)")
+
+
+if __name__ == "__main__":
+    days       = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    caregivers = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    rng = np.random.default_rng(0)
+    ids = np.array([f"WC-{i}" for i in range(caregivers)])
+    end = dt.date(2026, 1, 1)
+    path = pathlib.Path(tempfile.mkdtemp()) / "history.sqlite"
+
+    t0 = time.perf_counter()
+    for d in range(days):
+        run_date = end - dt.timedelta(days=days - 1 - d)
+        raw = pd.DataFrame({"caregiver_id": ids, "churn_prob": rng.random(caregivers),
+                            "remaining_days": rng.random(caregivers) * 900})
+        record_run(raw, finalize(raw, today=run_date), run_date, path=path)
+    elapsed = time.perf_counter() - t0
+    print(f"{days} runs × {caregivers} caregivers = {days * caregivers:,} rows "
+          f"recorded in {elapsed:.1f}s ({elapsed / days * 1000:.0f} ms per run), "
+          f"{path.stat().st_size / 2**20:.0f} MiB")
+
+    timed("trajectory, 90 days", lambda: trajectory("WC-1234", 90, end, path=path))
+    timed("trajectory, all history", lambda: trajectory("WC-1234", None, end, path=path))
+    timed("trend, 365 days", lambda: trend(365, end, path=path))
+    timed("trend, all history", lambda: trend(None, end, path=path))
@@ -0,0 +1,82 @@
+# benchmarks/bench_sources.py
+"""
+Multi-tab download against a local stand-in for Google Sheets.
+
+    python benchmarks/bench_sources.py [n_sources] [latency_s]
+
+Serves `n_sources` copies of the processed CSV from a local HTTP server
+that waits `latency_s` before each answer (the export endpoint is slow),
+then times fetch_sources():
+
+    sequential     one tab at a time (max_workers=1)
+    concurrent     all tabs at once
+    unchanged      the same again – the server answers 304 from the cache
+    one broken     one tab returns 500 and another has a wrong header; both
+                   fall back to their cached copy, the rest are unchanged
+"""
+import functools
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sources import Source, fetch_sources  # noqa: E402
+
+DATA = ROOT / "data" / "Caregiver Prediction - Processed_Data.csv"
+
+
+class SlowSheets(SimpleHTTPRequestHandler):
+    latency = 0.5
+    broken: set = set()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.path.split("/")[1] in self.broken:
+            self.send_error(500, "stand-in failure")
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label: str, sources, out: pathlib.Path, template: str, cache: pathlib.Path, workers: int):
+    t0 = time.perf_counter()
+    results = fetch_sources(sources, out, template=template, max_workers=workers, cache_dir=cache)
+    seconds = time.perf_counter() - t0
+    statuses = ", ".join(sorted({f"{sum(r.status == s for r in results)} {s}" for s in
+                                 (r.status for r in results)}))
+    print(f"{label:<12} {seconds:6.2f}s   {statuses}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    SlowSheets.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        sheets, cache, out = tmp / "sheets", tmp / "cache", tmp / "union.csv"
+        sources = [Source(f"branch{i}", f"tab{i}", "0") for i in range(n)]
+        for s in sources:
+            (sheets / s.sheet_id).mkdir(parents=True)
+            shutil.copy(DATA, sheets / s.sheet_id / "0.csv")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(SlowSheets, directory=str(sheets)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        template = f"http://127.0.0.1:{server.server_port}/{{sheet_id}}/{{gid}}.csv"
+        print(f"{n} sources, {SlowSheets.latency:.2f}s latency each\n")
+
+        timed("sequential", sources, out, template, tmp / "cache-seq", workers=1)
+        timed("concurrent", sources, out, template, cache, workers=n)
+        timed("unchanged", sources, out, template, cache, workers=n)
+
+        SlowSheets.broken = {sources[0].sheet_id}
+        (sheets / sources[1].sheet_id / "0.csv").write_text("not,the,roster\n1,2,3\n")
+        timed("one broken", sources, out, template, cache, workers=n)
+        server.shutdown()
@@ -0,0 +1,67 @@
+# benchmarks/bench_sparse_memory.py
+"""
+Peak memory of the feature path: dense (toarray + DataFrame, as training and
+scoring used to do) vs sparse (CSR straight into the models).
+
+    python benchmarks/bench_sparse_memory.py [rows] [provinces]
+
+Uses a synthetic roster whose home_province has `provinces` distinct
+values, so the one-hot block grows the way it does in production.
+"""
+import pathlib
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_prep import make_preprocessor, NUM_COLS, CAT_COLS     # noqa: E402
+
+
+def synthetic_roster(n: int, provinces: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: rng.random(n) * 100 for c in NUM_COLS + ["leave_ratio"]})
+    df["is_active_2025"] = rng.integers(0, 2, n)
+    for c in CAT_COLS:
+        df[c] = rng.choice([f"{c}_{i}" for i in range(8)], n)
+    df["home_province"] = rng.choice([f"P{i}" for i in range(provinces)], n)
+    return df
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} peak {peak / 2**20:8.1f} MiB   {elapsed:6.2f} s")
+    return peak
+
+
+if __name__ == "__main__":
+    n         = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    provinces = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    df  = synthetic_roster(n, provinces)
+    pre = make_preprocessor().fit(df)
+    names = pre.get_feature_names_out()
+    keep  = np.arange(0, len(names), 2)          # stand-in for the pruned column set
+    beta  = np.random.default_rng(1).normal(size=len(keep))
+    print(f"{n} rows × {len(names)} features")
+
+    def dense():
+        X = pd.DataFrame(pre.transform(df).toarray(), columns=names)
+        return X.iloc[:, keep].to_numpy() @ beta
+
+    def sparse():
+        X = pre.transform(df)
+        return X[:, keep] @ beta
+
+    assert np.allclose(dense(), sparse())
+    d = measure("dense", dense)
+    s = measure("sparse", sparse)
+    print(f"sparse uses {d / s:.0f}× less peak memory")
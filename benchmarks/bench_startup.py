@@ -0,0 +1,56 @@
+# benchmarks/bench_startup.py
+"""
+Start-up cost of the command line and the GUI.
+
+    python benchmarks/bench_startup.py [repeat]
+
+Times each command in a fresh interpreter (best of `repeat`) and reports
+the cumulative `python -X importtime` figure of its top-level module, plus
+the heaviest packages it pulled in. The GUI is measured by importing
+main_gui, which is everything the window needs before Tk draws it.
+"""
+import pathlib
+import re
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+COMMANDS = {
+    "python (bare)":        ["-c", "pass"],
+    "main.py --help":       ["main.py", "--help"],
+    "main.py history -h":   ["main.py", "history", "-h"],
+    "import main_gui":      ["-c", "import main_gui"],
+}
+HEAVY = ["pandas", "sklearn", "lifelines", "scipy", "requests", "tkinter"]
+
+
+def wall(args: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def import_times(args: list) -> dict:
+    """Cumulative import time (ms) per top-level package from -X importtime."""
+    err = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                         capture_output=True, text=True).stderr
+    times = {}
+    for m in re.finditer(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", err):
+        name = m.group(3)
+        if "." not in name:
+            times[name] = max(times.get(name, 0), int(m.group(1)) / 1000)
+    return times
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'command':<22} {'wall':>8}   heavy imports (cumulative ms)")
+    for label, args in COMMANDS.items():
+        times = import_times(args)
+        heavy = ", ".join(f"{p} {times[p]:.0f}" for p in HEAVY if p in times) or "-"
+        print(f"{label:<22} {wall(args, repeat):7.2f}s   {heavy}")
@@ -0,0 +1,48 @@
+# benchmarks/bench_validate.py
+"""
+Batch scoring with a few bad input values, with and without validation.
+
+    python benchmarks/bench_validate.py [rows] [bad_share]
+
+Repeats the processed CSV up to `rows` rows and puts a non-numeric value
+into `bad_share` of them. Without validation every chunk holding such a
+row fails as a whole and is rescored row by row; with validation the bad
+rows are rejected up front and the rest takes the batched path.
+"""
+import logging
+import pathlib
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from score import score_df_raw, validate_rows       # noqa: E402
+
+logging.getLogger("wecare").setLevel(logging.CRITICAL)
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    rows  = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.002
+    src = pd.read_csv(ROOT / "data" / "Caregiver Prediction - Processed_Data.csv")
+    df = src.iloc[np.arange(rows) % len(src)].reset_index(drop=True)
+    bad = np.random.default_rng(0).choice(rows, int(rows * share), replace=False)
+    df["incidents"] = df["incidents"].astype(object)
+    df.loc[bad, "incidents"] = "n/a"
+
+    score_df_raw(df.head(1000))                        # load the models
+    check = timed(lambda: validate_rows(df))
+    print(f"{rows} rows, {len(bad)} with a bad value")
+    print(f"validation alone            {check:6.2f} s")
+    print(f"scoring, no validation      {timed(lambda: score_df_raw(df, validate_input=False)):6.2f} s")
+    print(f"scoring with validation     {timed(lambda: score_df_raw(df)):6.2f} s")
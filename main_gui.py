@@ -7,9 +7,9 @@ Simple GUI version with a single button to run everything
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
+import queue
 import sys
 import os
-from datetime import datetime
 import pathlib
 
 # Add the src directory to the path
@@ -22,10 +22,15 @@ from main import (
     train_models, 
     generate_predictions_file, 
     open_results,
-    create_summary_report,
-    PREDICTIONS_FILE,
     DATA_DIR
 )
+from src.logger import LogFeed, attach_feed, get_logger
+from src.progress import ProgressReporter, PipelineCancelled
+
+log = get_logger("gui")
+
+LOG_POLL_MS   = 200        # how often the log widget pulls buffered records
+EVENT_POLL_MS = 100        # how often progress events are applied to the widgets
 
 class WeCareAutomationGUI:
     def __init__(self, root):
@@ -36,6 +41,9 @@ class WeCareAutomationGUI:
         
         # Variables
         self.is_running = False
+        self.events = queue.Queue()        # worker thread -> Tk main loop
+        self.reporter = None
+        self.last_prediction_path = None
         
         # Create main frame
         main_frame = ttk.Frame(root, padding="20")
@@ -62,7 +70,7 @@ class WeCareAutomationGUI:
         self.status_label.grid(row=0, column=0, sticky=tk.W)
         
         # Progress bar
-        self.progress = ttk.Progressbar(status_frame, mode='indeterminate')
+        self.progress = ttk.Progressbar(status_frame, mode='determinate')
         self.progress.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
         
         # Log frame
@@ -91,6 +99,12 @@ class WeCareAutomationGUI:
                                      state=tk.DISABLED)
         self.open_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Cancel button – stops training/scoring at the next chunk boundary
+        self.cancel_button = ttk.Button(button_frame, text="⛔ Cancel", 
+                                       command=self.cancel_automation,
+                                       state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+        
         # Clear log button
         self.clear_button = ttk.Button(button_frame, text="🧹 Clear Log", 
                                       command=self.clear_log)
@@ -100,24 +114,32 @@ class WeCareAutomationGUI:
         style = ttk.Style()
         style.configure('Accent.TButton', font=('Arial', 10, 'bold'))
         
+        # Log records from every pipeline module are buffered here and
+        # flushed into the widget in batches by _poll_log_feed()
+        self.log_feed = attach_feed(LogFeed())
+        self._poll_log_feed()
+        self._poll_events()
+        
         # Initialize log
         self.log_message("🏥 WeCare247 Churn Prediction Automation Ready")
         self.log_message("📅 Click 'Run Automation' to start the process")
         self.log_message("=" * 60)
     
     def log_message(self, message):
-        """Add a message to the log"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
-        
-        self.log_text.insert(tk.END, formatted_message)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add a message to the log (safe to call from any thread)"""
+        log.info(message)
+    
+    def _poll_log_feed(self):
+        """Move buffered log lines into the text widget in one insert"""
+        lines = self.log_feed.drain()
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.log_text.see(tk.END)
+        self.root.after(LOG_POLL_MS, self._poll_log_feed)
     
     def update_status(self, message):
-        """Update the status label"""
+        """Update the status label (main thread only)"""
         self.status_label.config(text=message)
-        self.root.update_idletasks()
     
     def clear_log(self):
         """Clear the log text area"""
@@ -127,95 +149,128 @@ class WeCareAutomationGUI:
     def open_results_folder(self):
         """Open the results folder"""
         try:
-            open_results()
+            open_results(self.last_prediction_path or DATA_DIR)
             self.log_message("✅ Results folder opened")
         except Exception as e:
             self.log_message(f"❌ Error opening results: {e}")
     
-    def run_automation_thread(self):
-        """Run the automation in a separate thread"""
+    # ------------------------------------------------------------------
+    # Worker thread: runs the pipeline and only talks to the GUI through
+    # self.events (progress) and the logger (messages) – never widgets.
+    def run_automation_thread(self, reporter):
+        """Run the automation in a separate thread, under the same lock as main.py and the service"""
+        from src.service import LockBusy, pipeline_lock
+        try:
+            with pipeline_lock():
+                self._run_steps(reporter)
+        except LockBusy as e:
+            log.warning("⏭️  Not started – %s", e)
+            reporter.finish("error", f"Another run is in progress: {e}")
+        except OSError as e:                 # lock file unusable – the run must still end visibly
+            log.error("❌ Could not take the run lock: %s", e)
+            reporter.finish("error", f"Could not take the run lock: {e}")
+    
+    def _run_steps(self, reporter):
         try:
-            self.is_running = True
-            self.run_button.config(state=tk.DISABLED)
-            self.progress.start()
-            
             # Step 1: Fetch data
-            self.update_status("📊 Fetching data from Google Sheets...")
-            self.log_message("📊 Step 1: Fetching data from Google Sheets...")
-            
+            reporter.stage("fetch", message="📊 Fetching data from Google Sheets...")
             if not fetch_google_sheet_data():
-                self.log_message("❌ Failed to fetch data from Google Sheets")
-                self.show_error("Failed to fetch data from Google Sheets")
+                reporter.finish("error", "Failed to fetch data from Google Sheets")
                 return
-            
-            self.log_message("✅ Data fetched successfully")
+            reporter.check()
             
             # Step 2: Prepare data
-            self.update_status("🧹 Preparing data...")
-            self.log_message("🧹 Step 2: Cleaning and preparing data...")
-            
+            reporter.stage("prepare", message="🧹 Preparing data...")
             if not prepare_data():
-                self.log_message("❌ Failed to prepare data")
-                self.show_error("Failed to prepare data")
+                reporter.finish("error", "Failed to prepare data")
                 return
+            reporter.check()
             
-            self.log_message("✅ Data preparation completed")
-            
-            # Step 3: Train models
-            self.update_status("🚀 Training models...")
-            self.log_message("🚀 Step 3: Training prediction models...")
-            
-            if not train_models():
-                self.log_message("❌ Failed to train models")
-                self.show_error("Failed to train models")
+            # Step 3: Train models (publishes its own fold / step counts)
+            if not train_models(reporter):
+                reporter.finish("error", "Failed to train models")
                 return
             
-            self.log_message("✅ Models trained successfully")
-            
-            # Step 4: Generate predictions
-            self.update_status("🔮 Generating predictions...")
-            self.log_message("🔮 Step 4: Generating predictions...")
-            
-            if not generate_predictions_file():
-                self.log_message("❌ Failed to generate predictions")
-                self.show_error("Failed to generate predictions")
+            # Step 4: Generate predictions (publishes rows scored)
+            prediction_path = generate_predictions_file(reporter)
+            if not prediction_path:
+                reporter.finish("error", "Failed to generate predictions")
                 return
             
-            self.log_message("✅ Predictions generated successfully")
-            
-            # Step 5: Create summary
-            self.update_status("📝 Creating summary report...")
-            self.log_message("📝 Step 5: Creating summary report...")
+            self.last_prediction_path = prediction_path
+            reporter.finish("done", str(prediction_path))
             
-            create_summary_report()
-            self.log_message("✅ Summary report created")
-            
-            # Success
-            self.update_status("🎉 Automation completed successfully!")
+        except PipelineCancelled as e:
+            log.warning("⛔ Automation cancelled (%s)", e)
+            reporter.finish("cancelled", str(e))
+        except Exception as e:
+            log.error("❌ Unexpected error: %s", e, exc_info=True)
+            reporter.finish("error", f"Unexpected error: {e}")
+    
+    # ------------------------------------------------------------------
+    # Tk main loop side
+    STAGE_LABELS = {
+        "train_churn":  "🎯 Training churn model",
+        "train_tenure": "⏰ Training tenure model",
+        "score":        "🔮 Generating predictions",
+    }
+    
+    def _poll_events(self):
+        """Apply queued progress events to the widgets"""
+        try:
+            while True:
+                self._apply_event(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(EVENT_POLL_MS, self._poll_events)
+    
+    def _apply_event(self, event):
+        label = self.STAGE_LABELS.get(event.stage, event.stage)
+        
+        if event.kind == "stage":
+            self.progress.stop()
+            if event.total:
+                self.progress.config(mode='determinate', maximum=event.total, value=0)
+            else:
+                # stages without a row/step count keep the bar moving
+                self.progress.config(mode='indeterminate')
+                self.progress.start()
+            self.update_status(event.message or f"{label}...")
+        
+        elif event.kind == "progress":
+            self.progress.config(value=event.done)
+            eta = f" – about {int(event.eta_seconds)}s left" if event.eta_seconds is not None else ""
+            self.update_status(f"{label}: {event.done}/{event.total}{eta}")
+        
+        elif event.kind == "done":
+            self._run_finished("🎉 Automation completed successfully!")
             self.log_message("=" * 60)
             self.log_message("🎉 AUTOMATION COMPLETED SUCCESSFULLY! 🎉")
-            self.log_message(f"📊 Your predictions are ready in: {PREDICTIONS_FILE}")
+            self.log_message(f"📊 Your predictions are ready in: {event.message}")
             self.log_message(f"📁 All files are in: {DATA_DIR}")
             self.log_message("=" * 60)
-            
-            # Enable open results button
             self.open_button.config(state=tk.NORMAL)
-            
-            # Show success message
             messagebox.showinfo("Success", 
                               f"Automation completed successfully!\n\n"
-                              f"Predictions saved to:\n{PREDICTIONS_FILE}\n\n"
+                              f"Predictions saved to:\n{event.message}\n\n"
                               f"Click 'Open Results' to view the files.")
-            
-        except Exception as e:
-            self.log_message(f"❌ Unexpected error: {e}")
-            self.show_error(f"Unexpected error: {e}")
         
-        finally:
-            self.is_running = False
-            self.run_button.config(state=tk.NORMAL)
-            self.progress.stop()
-            self.update_status("Ready to run automation")
+        elif event.kind == "cancelled":
+            self._run_finished("⛔ Automation cancelled")
+        
+        elif event.kind == "error":
+            self._run_finished("❌ Automation failed")
+            self.log_message(f"❌ {event.message}")
+            self.show_error(event.message)
+    
+    def _run_finished(self, status):
+        self.is_running = False
+        self.reporter = None
+        self.progress.stop()
+        self.progress.config(mode='determinate', value=0)
+        self.run_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_status(status)
     
     def run_automation(self):
         """Start the automation process"""
@@ -226,11 +281,24 @@ class WeCareAutomationGUI:
         self.clear_log()
         self.log_message("🚀 Starting WeCare247 Churn Prediction Automation...")
         
+        self.is_running = True
+        self.run_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.reporter = ProgressReporter(self.events)
+        
         # Run in separate thread to avoid blocking UI
-        thread = threading.Thread(target=self.run_automation_thread)
+        thread = threading.Thread(target=self.run_automation_thread, args=(self.reporter,))
         thread.daemon = True
         thread.start()
     
+    def cancel_automation(self):
+        """Ask the running pipeline to stop at its next checkpoint"""
+        if self.reporter is not None and not self.reporter.cancelled:
+            self.reporter.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.update_status("⛔ Cancelling – finishing the current chunk...")
+            self.log_message("⛔ Cancel requested")
+    
     def show_error(self, message):
         """Show error message"""
         messagebox.showerror("Error", message)
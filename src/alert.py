@@ -6,6 +6,9 @@ import unicodedata
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
+from logger import get_logger
+
+log = get_logger(__name__)
 
 # A concise, non-debugging version of the cleaning function
 def _bulletproof_clean(text):
@@ -45,7 +48,7 @@ def send_alerts(pred_df, full_report_path, filtered_report_path):
     """Filters for high and medium risk, and sends an HTML email with attachments."""
     relevant_risk_df = pred_df[pred_df['risk_level'].isin(['HIGH', 'MEDIUM'])]
     if relevant_risk_df.empty:
-        print("No high or medium risk caregivers to report.")
+        log.info("No high or medium risk caregivers to report.")
         return
 
     # --- e-mail ---
@@ -94,11 +97,11 @@ def send_alerts(pred_df, full_report_path, filtered_report_path):
                 # Add header to make it an attachment
                 part['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
                 msg.attach(part)
-                print(f"📎 Attached {os.path.basename(file_path)}")
+                log.info("📎 Attached %s", os.path.basename(file_path))
             except FileNotFoundError:
-                print(f"❌ Attachment Error: Could not find file {file_path}")
+                log.error("❌ Attachment Error: Could not find file %s", file_path)
             except Exception as e:
-                print(f"❌ Attachment Error: Failed to attach {file_path}. Reason: {e}")
+                log.error("❌ Attachment Error: Failed to attach %s. Reason: %s", file_path, e)
 
         # 5. Send the email
         ctx = ssl.create_default_context()
@@ -108,7 +111,7 @@ def send_alerts(pred_df, full_report_path, filtered_report_path):
             # Send the message as a string
             s.sendmail(from_addr, [to_addr], msg.as_string())
 
-        print("📧 Email alert with attachments sent successfully.")
+        log.info("📧 Email alert with attachments sent successfully.")
 
     except (AssertionError, Exception) as e:
-        print(f"❌ Failed to send email alert: {e}")
\ No newline at end of file
+        log.error("❌ Failed to send email alert: %s", e)
\ No newline at end of file
@@ -1,16 +1,57 @@
 # src/api.py
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
-from score import predict_single
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from score import load_models, predict_record, score_df_raw, validate_rows
+from postprocess import finalize
+from whatif import rebucket
+from history import trajectory, trend
+from logger import configure_logging
+import profiling
 
-app = FastAPI(title="WeCare247 Churn Predictor")
+try:
+    import orjson
+except ImportError:                        # optional: FastAPI's own encoder is used instead
+    orjson = None
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the models at start-up, not in the first request
+    load_models()
+    yield
+
+app = FastAPI(title="WeCare247 Churn Predictor", lifespan=lifespan)
+
+# opt-in: PROFILE_API=1 writes a CPU / memory profile per request to data/profiles/
+if os.getenv("PROFILE_API", "").lower() in ("1", "true", "yes"):
+    profiling.enable("api")
+    _profile_gate = asyncio.Lock()
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        # every route, parsing on the event loop included; one request at a
+        # time so each profile holds exactly one request's work
+        async with _profile_gate:
+            with profiling.stage(f"api {request.method} {request.url.path}", all_threads=True):
+                return await call_next(request)
 
 class CaregiverPayload(BaseModel):
     caregiver_id: str
-    tenure_days: int = Field(..., ge=0)
-    age: int
-    waiting_days: int
-    total_leave_days: int
+    tenure_days: float = Field(..., ge=0)          # same types as validate.RULES
+    age: float
+    waiting_days: float
+    total_leave_days: float
     days_worked_2025: float
     work_ratio_2025: float
     rank: int
@@ -23,7 +64,105 @@ class CaregiverPayload(BaseModel):
     current_status: str
     home_province: str
 
-@app.post("/predict")
-def predict(payload: CaregiverPayload):
-    result = predict_single(payload.dict())
-    return result
+class Prediction(BaseModel):
+    caregiver_id: str
+    churn_probability: Optional[float]
+    risk_level: str
+    days_to_quit_est: Union[int, str, None]
+    estimated_quit_date: Optional[str]
+    churn_drivers: Optional[str] = None        # only with the serving bundles
+    tenure_drivers: Optional[str] = None
+    error: Optional[str] = None
+
+class Rejected(BaseModel):
+    index: int
+    caregiver_id: Optional[str]
+    reasons: List[str]
+
+class BatchResult(BaseModel):
+    predictions: List[Prediction]
+    rejected: List[Rejected]
+
+# built once: parsing / dumping then runs entirely in pydantic-core
+PAYLOAD    = TypeAdapter(CaregiverPayload)
+PREDICTION = TypeAdapter(Prediction)
+
+
+class ORJSONBody(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # numpy scalars and arrays as is, NaN → null
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _json(content):
+    """Send `content` as is with orjson, skipping FastAPI's jsonable_encoder pass (if orjson is installed)."""
+    return ORJSONBody(content) if orjson is not None else content
+
+
+@app.post("/predict", response_model=Prediction, openapi_extra={"requestBody": {
+    "required": True, "content": {"application/json": {"schema": CaregiverPayload.model_json_schema()}}}})
+async def predict(request: Request, as_of: Optional[date] = None, tenure_for_all: bool = False):
+    # quit dates are counted from `as_of` (default: the day of the request);
+    # the tenure model is skipped for LOW risk unless tenure_for_all is set.
+    # The body goes bytes → payload in one validate_json call on the event
+    # loop; scoring is CPU work and runs in the thread pool so it never
+    # blocks other requests (a slow pickled model, a reload, a profile)
+    try:
+        payload = PAYLOAD.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])}
+                                      for err in e.errors(include_url=False)])
+    body = await run_in_threadpool(_predict, payload.model_dump(), as_of, tenure_for_all)
+    return Response(body, media_type="application/json")
+
+def _predict(cg: dict, as_of: Optional[date], tenure_for_all: bool) -> bytes:
+    try:
+        result = predict_record(cg, today=as_of, tenure_for_all=tenure_for_all)
+    except ValueError as e:                 # e.g. a category the models have never seen
+        raise HTTPException(status_code=422, detail=str(e))
+    return PREDICTION.dump_json(PREDICTION.validate_python(result), exclude_unset=True)
+
+@app.post("/predict/batch", response_model=BatchResult)
+def predict_batch(rows: List[Dict[str, Any]], as_of: Optional[date] = None,
+                  tenure_for_all: bool = False):
+    # the whole batch is validated at once: bad rows are reported, the rest scored
+    df = pd.DataFrame(rows)
+    validation = validate_rows(df)
+    raw = score_df_raw(df, tenure_for_all=tenure_for_all, validation=validation)
+    preds = finalize(raw, today=as_of)[validation.valid]
+    if "error" in preds and preds["error"].isna().all():     # only rejected rows had errors
+        preds = preds.drop(columns="error")
+    rejected = [{"index": int(i), "caregiver_id": rows[i].get("caregiver_id"),
+                 "reasons": validation.reasons[i].split("; ")}
+                for i in (~validation.valid).nonzero()[0]]
+    return _json({"predictions": _records(preds), "rejected": rejected})
+
+@app.get("/whatif")
+def whatif(high: Optional[float] = None, medium: Optional[float] = None, limit: int = 50):
+    # re-bucket the last batch run's stored probabilities – the models are not used
+    try:
+        return _json(rebucket(high, medium, limit=limit))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _records(df):
+    # JSON has no NaN – missing values go out as null
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+@app.get("/history/trend")
+def history_trend(days: int = 90):
+    # roster-wide risk counts per run date (days=0 → all history)
+    return _json(_records(trend(days or None)))
+
+@app.get("/history/{caregiver_id}")
+def history(caregiver_id: str, days: int = 90):
+    # one caregiver's score trajectory over the last `days` days
+    rows = trajectory(caregiver_id, days or None)
+    if rows.empty:
+        raise HTTPException(status_code=404, detail=f"No history for {caregiver_id}")
+    return _json(_records(rows))
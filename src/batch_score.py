@@ -1,54 +1,138 @@
 # src/batch_score.py
 
+import json
 import pathlib
 import pandas as pd
 import datetime as dt
-from score import predict_df
+from score import score_df_raw, reload_models, validate_rows
+from postprocess import finalize
+from whatif import save_store
+from history import record_run
 from alert import send_alerts
 from typing import Optional
+from logger import get_logger, configure_logging
+from progress import ProgressReporter
+from profiling import stage
 
 # Define paths for the prediction outputs
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 PROCESSED_DATA_PATH = DATA_DIR / "Caregiver Prediction - Processed_Data.csv"
-OUT_PATH = DATA_DIR / f"churn_predictions_{dt.date.today()}.csv"
-FILTERED_OUT_PATH = DATA_DIR / f"churn_predictions_filtered_{dt.date.today()}.csv"
 
-def generate_predictions() -> Optional[pathlib.Path]:
+def output_paths(run_date: dt.date):
+    """Main and filtered prediction files for one run date."""
+    return (DATA_DIR / f"churn_predictions_{run_date}.csv",
+            DATA_DIR / f"churn_predictions_filtered_{run_date}.csv")
+
+def rejections_path(run_date: dt.date) -> pathlib.Path:
+    """Input rows that failed validation (with reasons) for one run date."""
+    return DATA_DIR / f"rejected_rows_{run_date}.csv"
+
+def summary_path(run_date: dt.date) -> pathlib.Path:
+    """JSON run summary (row counts, risk counts, skipped work) for one run date."""
+    return DATA_DIR / f"run_summary_{run_date}.json"
+
+log = get_logger(__name__)
+
+def generate_predictions(progress: Optional[ProgressReporter] = None,
+                         chunk_size: int = 1000,
+                         run_date: Optional[dt.date] = None,
+                         tenure_for_all: bool = False,
+                         retrain_on_drift: bool = False) -> Optional[pathlib.Path]:
     """
     Generates and saves churn predictions.
     Returns the Path to the main predictions file on success, otherwise None.
+    Scoring progress is published to `progress`; a cancel raises PipelineCancelled.
+    `run_date` (default: today) names the output files and is the reference
+    date for estimated quit dates. With `tenure_for_all` the tenure model
+    also runs for LOW-risk caregivers (same CSV output, but the stored
+    remaining days are complete for threshold what-ifs). With
+    `retrain_on_drift`, a drift report that asks for retraining retrains
+    both models after the outputs are written; the next run uses them.
     """
+    run_date = run_date or dt.date.today()
+    out_path, filtered_out_path = output_paths(run_date)
+    summary = {"run_date": str(run_date)}
     try:
         # Step 1: Read the source data and generate predictions
         if not PROCESSED_DATA_PATH.exists():
-            print(f"❌ Source data not found at: {PROCESSED_DATA_PATH}")
+            log.error("❌ Source data not found at: %s", PROCESSED_DATA_PATH)
             return None
             
-        now_df = pd.read_csv(PROCESSED_DATA_PATH)
-        preds_df = predict_df(now_df)
+        with stage("score"):
+            now_df = pd.read_csv(PROCESSED_DATA_PATH)
+
+            # Invalid rows are not scored; they go to a rejection report instead
+            validation = validate_rows(now_df)
+            if validation.n_rejected:
+                validation.report(now_df).to_csv(rejections_path(run_date), index=False)
+                log.info("Rejected rows saved to: %s", rejections_path(run_date))
+
+            raw_scores = score_df_raw(now_df, progress=progress, chunk_size=chunk_size,
+                                      tenure_for_all=tenure_for_all, summary=summary,
+                                      validation=validation)
+            preds_df = finalize(raw_scores, today=run_date)
+            summary["risk_counts"] = preds_df["risk_level"].value_counts().to_dict()
 
         # Step 2: Save the initial churn predictions
-        preds_df.to_csv(OUT_PATH, index=False)
-        print(f"Saved: {OUT_PATH}")
+        preds_df.to_csv(out_path, index=False)
+        log.info("Saved: %s", out_path)
 
         # Step 3: Filter out caregivers who have already churned and are high risk
         filtered_preds = filter_predictions(now_df, preds_df)
 
         # Step 4: Save the filtered predictions to a new CSV
-        filtered_preds.to_csv(FILTERED_OUT_PATH, index=False)
-        print(f"Filtered predictions saved to: {FILTERED_OUT_PATH}")
+        filtered_preds.to_csv(filtered_out_path, index=False)
+        log.info("Filtered predictions saved to: %s", filtered_out_path)
+
+        # The what-if store and the history are extras: a failure here doesn't stop the run
+        with stage("store_history"):
+            # Keep the raw probabilities so thresholds can be re-tuned without rescoring
+            try:
+                save_store(raw_scores, now_df, run_date)
+            except Exception as e:
+                log.warning("⚠️ Could not save the scores for what-ifs: %s", e)
+
+            # Append the run to the prediction history
+            try:
+                n = record_run(raw_scores, preds_df, run_date)
+                log.info("🗂️  %d predictions added to the history for %s", n, run_date)
+            except Exception as e:
+                log.warning("⚠️ Could not record the run in the prediction history: %s", e)
 
         # Step 5: Notify HR with the results and file attachments
-        send_alerts(filtered_preds, OUT_PATH, FILTERED_OUT_PATH)
+        with stage("alert"):
+            send_alerts(filtered_preds, out_path, filtered_out_path)
+
+        # Step 6: Retrain when the input data has drifted from the training data
+        if retrain_on_drift and summary.get("drift", {}).get("retrain"):
+            summary["retrained"] = retrain_models()
+
+        # Step 7: Run summary next to the outputs
+        summary_path(run_date).write_text(json.dumps(summary, indent=2, default=str))
+        log.info("Run summary saved to: %s", summary_path(run_date))
         
         # On success, return the path of the created predictions file
-        return OUT_PATH
+        return out_path
         
     except Exception as e:
-        print(f"❌ Error in generate_predictions: {e}")
+        log.error("❌ Error in generate_predictions: %s", e, exc_info=True)
         return None
 
+def retrain_models(reason: str = "input drift") -> bool:
+    """Retrain both models on the current data (after drift, or on the service schedule)."""
+    from train_churn import train_churn_model         # training stack only when needed
+    from train_tenure import train_tenure_model
+
+    log.info("🔁 Retraining both models (%s)…", reason)
+    ok = train_churn_model() and train_tenure_model()
+    if ok:
+        reload_models()                  # a long-running service keeps using this process
+        log.info("✅ Models retrained – the next run scores with them")
+    else:
+        log.error("❌ Retraining failed – keeping the current models")
+    return ok
+
 def filter_predictions(source_df: pd.DataFrame, pred_df: pd.DataFrame) -> pd.DataFrame:
     """
     Filters predictions to exclude caregivers who have already churned (churn_label == 1)
@@ -69,8 +153,9 @@ def filter_predictions(source_df: pd.DataFrame, pred_df: pd.DataFrame) -> pd.Dat
 
 if __name__ == "__main__":
     # This part is for direct testing of the module
+    configure_logging()
     saved_file = generate_predictions()
     if saved_file:
-        print(f"✅ Predictions generated successfully at: {saved_file}")
+        log.info("✅ Predictions generated successfully at: %s", saved_file)
     else:
-        print("❌ Failed to generate predictions")
\ No newline at end of file
+        log.error("❌ Failed to generate predictions")
\ No newline at end of file
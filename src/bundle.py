@@ -0,0 +1,427 @@
+# src/bundle.py
+"""
+Serving bundles: the parts of the trained models that inference needs,
+stored as plain .npy arrays + a small meta.json per model.
+
+    models/churn_serving/   imputer fills, one-hot vocabularies, GBM trees
+                            (+ node means for risk-driver explanations),
+                            drift reference of the training inputs (meta.json)
+    models/tenure_serving/  imputer fills, one-hot vocabularies, Cox
+                            coefficients, training means, baseline hazard
+
+Arrays are opened with np.load(mmap_mode="r"), so loading takes
+milliseconds and every API worker / pool process that loads the same
+bundle shares the same page-cache pages instead of unpickling a private
+copy of the sklearn / lifelines objects. The *.joblib files are still
+written by training and remain the fallback when no bundle exists.
+
+Before a bundle is written, its serving object scores a sample of the
+training rows and must match the fitted model (PARITY_RTOL); otherwise
+the export raises ValueError and the previous bundle stays in place.
+"""
+import json
+import os
+import pathlib
+import shutil
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, hstack, issparse
+from scipy.special import expit
+
+FORMAT_VERSION = 1
+LN2 = np.log(2.0)
+PARITY_ROWS = 500          # training rows scored by both the fitted model and its bundle
+PARITY_RTOL = 1e-9
+
+
+# ------------------------------------------------------------------
+# Writing
+def _write_bundle(path: pathlib.Path, meta: dict, arrays: dict) -> pathlib.Path:
+    """Write meta.json + one .npy per array into `path`, replacing it as a whole."""
+    path = pathlib.Path(path)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr), allow_pickle=False)
+    meta = {"format": FORMAT_VERSION, **meta, "arrays": sorted(arrays)}
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=1))
+
+    # swap directories; processes that still map the old files keep their pages
+    old = path.with_name(f"{path.name}.old-{os.getpid()}")
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def _check_parity(what: str, served, fitted) -> None:
+    """ValueError unless the bundle's outputs equal the fitted model's (inf == inf)."""
+    served, fitted = np.asarray(served, dtype=float), np.asarray(fitted, dtype=float)
+    if served.shape != fitted.shape or not np.allclose(served, fitted, rtol=PARITY_RTOL, atol=0):
+        with np.errstate(invalid="ignore"):
+            gap = np.nanmax(np.abs(served - fitted)) if served.shape == fitted.shape else np.nan
+        raise ValueError(f"{what} bundle does not reproduce the fitted model "
+                         f"(max difference {gap:.3g}) – not exported")
+
+
+def _export_preprocessor(pre) -> tuple:
+    """Imputer fills and one-hot vocabularies of a fitted make_preprocessor()."""
+    num_name, num_proc, num_cols = pre.transformers_[0]
+    cat_name, cat_proc, cat_cols = pre.transformers_[1]
+    onehot = cat_proc.named_steps["onehot"]
+
+    meta = {
+        "num_cols":      list(num_cols),
+        "cat_cols":      list(cat_cols),
+        "cat_fill":      np.asarray(cat_proc.named_steps["impute"].statistics_).tolist(),
+        "categories":    [np.asarray(c).tolist() for c in onehot.categories_],
+        "feature_names": [str(f) for f in pre.get_feature_names_out()],
+    }
+    arrays = {"num_fill": np.asarray(num_proc.named_steps["impute"].statistics_, dtype=float)}
+    return meta, arrays
+
+
+def _node_means(tree) -> np.ndarray:
+    """
+    Value of every node as the cover-weighted mean of its leaves. sklearn
+    only line-searches the leaf values of a boosting stage, so the stored
+    internal values don't match them; path contributions need these.
+    """
+    mean  = tree.value[:, 0, 0].astype(np.float64).copy()
+    cover = tree.weighted_n_node_samples
+    left, right = tree.children_left, tree.children_right
+    for node in range(tree.node_count - 1, -1, -1):     # children have higher ids
+        if left[node] >= 0:
+            l, r = left[node], right[node]
+            mean[node] = (cover[l] * mean[l] + cover[r] * mean[r]) / (cover[l] + cover[r])
+    return mean
+
+
+def export_churn_bundle(clf, pre, path: pathlib.Path, X_check,
+                        drift: Optional[dict] = None) -> pathlib.Path:
+    """
+    Flatten a fitted binary GradientBoostingClassifier into tree arrays.
+    `X_check` (encoded rows) must get the same predict_proba from the
+    bundle as from `clf`. `drift` is the training-data sketch from
+    drift.build_reference().
+    """
+    meta, arrays = _export_preprocessor(pre)
+
+    trees = [est[0].tree_ for est in clf.estimators_]
+    sizes = np.array([t.node_count for t in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    def _children(attr):
+        # child ids become global node ids; leaves keep -1
+        return np.concatenate([
+            np.where(getattr(t, attr) >= 0, getattr(t, attr) + r, -1)
+            for t, r in zip(trees, roots)
+        ]).astype(np.int32)
+
+    arrays.update({
+        "roots":     roots.astype(np.int32),
+        "feature":   np.concatenate([t.feature for t in trees]).astype(np.int32),
+        "threshold": np.concatenate([t.threshold for t in trees]).astype(np.float64),
+        "left":      _children("children_left"),
+        "right":     _children("children_right"),
+        "value":     np.concatenate([t.value[:, 0, 0] for t in trees]).astype(np.float64),
+        "node_mean": np.concatenate([_node_means(t) for t in trees]),
+    })
+    n_features = len(meta["feature_names"])
+    meta.update({
+        "kind":          "gbm_binary",
+        "learning_rate": float(clf.learning_rate),
+        "init_raw":      float(clf._raw_predict_init(np.zeros((1, n_features), np.float32))[0, 0]),
+        "max_depth":     int(max(t.max_depth for t in trees)),
+    })
+    if drift is not None:
+        meta["drift"] = drift
+
+    X_check = X_check[:PARITY_ROWS]
+    _check_parity("churn", TreeEnsemble(meta, arrays).predict_proba(X_check)[:, 1],
+                  clf.predict_proba(X_check)[:, 1])
+    return _write_bundle(path, meta, arrays)
+
+
+def export_tenure_bundle(cph, pre, path: pathlib.Path, X_check) -> pathlib.Path:
+    """
+    Keep only the Cox coefficients, training means and baseline cumulative
+    hazard. `X_check` (encoded rows, all of pre's features) must get the
+    same predict_median from the bundle as from `cph`.
+    """
+    meta, arrays = _export_preprocessor(pre)
+
+    names = [str(n) for n in cph.params_.index]
+    position = {f: i for i, f in enumerate(meta["feature_names"])}
+    bch = cph.baseline_cumulative_hazard_.iloc[:, 0]
+
+    arrays.update({
+        "params":    cph.params_.to_numpy(dtype=float),
+        "norm_mean": cph._norm_mean.reindex(cph.params_.index).to_numpy(dtype=float),
+        "param_idx": np.array([position[n] for n in names], dtype=np.int32),
+        "bh_times":  bch.index.to_numpy(dtype=float),
+        "bh_cumhaz": bch.to_numpy(dtype=float),
+    })
+    meta.update({"kind": "cox_ph", "param_names": names})
+
+    X_check = X_check[:PARITY_ROWS]
+    X_dense = X_check.toarray() if issparse(X_check) else np.asarray(X_check, dtype=float)
+    fitted = cph.predict_median(pd.DataFrame(X_dense[:, arrays["param_idx"]], columns=names))
+    _check_parity("tenure", CoxServing(meta, arrays).predict_median(X_check),
+                  np.asarray(fitted, dtype=float).reshape(-1))
+    return _write_bundle(path, meta, arrays)
+
+
+# ------------------------------------------------------------------
+# Serving objects (same method names as the sklearn / lifelines ones they replace)
+class ServingPreprocessor:
+    """Median / most-frequent imputation + one-hot encoding, as make_preprocessor() fits it."""
+
+    def __init__(self, meta: dict, arrays: dict):
+        self.num_cols      = meta["num_cols"]
+        self.cat_cols      = meta["cat_cols"]
+        self.cat_fill      = meta["cat_fill"]
+        self.categories    = meta["categories"]
+        self.feature_names = np.array(meta["feature_names"], dtype=object)
+        self.num_fill      = arrays["num_fill"]
+        # category → encoded column, per categorical input (for encode())
+        offsets = len(self.num_cols) + np.cumsum([0] + [len(c) for c in self.categories[:-1]])
+        self._cat_index = [{cat: int(o) + j for j, cat in enumerate(cats)}
+                           for o, cats in zip(offsets, self.categories)]
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return self.feature_names
+
+    def feature_groups(self) -> tuple:
+        """(input column names, input column index of every encoded feature)."""
+        names = list(self.num_cols) + list(self.cat_cols)
+        index = np.concatenate([
+            np.arange(len(self.num_cols)),
+            *[np.full(len(cats), len(self.num_cols) + i) for i, cats in enumerate(self.categories)],
+        ]).astype(np.intp)
+        return names, index
+
+    def transform(self, df: pd.DataFrame) -> csr_matrix:
+        """CSR feature matrix; the one-hot block is built from category codes, never densified."""
+        n = len(df)
+        num = df[self.num_cols].to_numpy(dtype=float, na_value=np.nan)
+        num = np.where(np.isnan(num), self.num_fill, num)
+
+        rows, cols = [], []
+        offset = len(self.num_cols)
+        for col, fill, cats in zip(self.cat_cols, self.cat_fill, self.categories):
+            codes = pd.Categorical(df[col].fillna(fill), categories=cats).codes
+            known = np.flatnonzero(codes >= 0)       # unknown categories → all zeros
+            rows.append(known)
+            cols.append(offset + codes[known])
+            offset += len(cats)
+
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        onehot = csr_matrix((np.ones(len(rows)), (rows, cols - len(self.num_cols))),
+                            shape=(n, offset - len(self.num_cols)))
+        return hstack([csr_matrix(num), onehot], format="csr")
+
+    def encode(self, records: list) -> np.ndarray:
+        """
+        transform() for a few dicts, without building a DataFrame: a dense
+        (n_rows, n_features) array with the same values.
+        """
+        num = np.array([[np.nan if r.get(c) is None else r[c] for c in self.num_cols] for r in records],
+                       dtype=float).reshape(len(records), len(self.num_cols))
+        X = np.zeros((len(records), len(self.feature_names)))
+        X[:, :len(self.num_cols)] = np.where(np.isnan(num), self.num_fill, num)
+        for i, r in enumerate(records):
+            for col, fill, index in zip(self.cat_cols, self.cat_fill, self._cat_index):
+                value = r.get(col)
+                if value is None or value != value:          # missing or NaN
+                    value = fill
+                j = index.get(value)                         # unknown categories → all zeros
+                if j is not None:
+                    X[i, j] = 1.0
+        return X
+
+
+class _Cells:
+    """
+    Element lookup X[rows, cols] (float32, like sklearn's trees) for a dense
+    array or a CSR matrix. A CSR chunk small enough to densify cheaply is
+    densified (direct indexing is much faster); larger ones are addressed
+    by a sorted key row * n_cols + col, so lookups are a binary search and
+    the matrix is never densified.
+    """
+    DENSE_LIMIT = 1 << 22          # cells (16 MB as float32)
+
+    def __init__(self, X):
+        self.n_rows = X.shape[0]
+        if not issparse(X) or X.shape[0] * X.shape[1] <= self.DENSE_LIMIT:
+            self.dense = X.toarray().astype(np.float32) if issparse(X) else np.asarray(X, dtype=np.float32)
+            return
+        X = csr_matrix(X, dtype=np.float32)
+        X.sum_duplicates()                              # canonical: sorted, unique
+        self.dense  = None
+        self.n_cols = X.shape[1]
+        self.data   = X.data
+        self.keys   = (np.repeat(np.arange(self.n_rows, dtype=np.int64), np.diff(X.indptr))
+                       * self.n_cols + X.indices)
+
+    def __getitem__(self, idx) -> np.ndarray:
+        rows, cols = idx
+        if self.dense is not None:
+            return self.dense[rows, cols]
+        if not len(self.keys):
+            return np.zeros(np.broadcast(rows, cols).shape, np.float32)
+        query = rows * self.n_cols + cols
+        pos = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        return np.where(self.keys[pos] == query, self.data[pos], np.float32(0))
+
+
+class TreeEnsemble:
+    """predict_proba of a binary GradientBoostingClassifier from flattened trees."""
+
+    def __init__(self, meta: dict, arrays: dict):
+        self.learning_rate = meta["learning_rate"]
+        self.init_raw      = meta["init_raw"]
+        self.max_depth     = meta["max_depth"]
+        for name in ("roots", "feature", "threshold", "left", "right", "value"):
+            setattr(self, name, arrays[name])
+        self.node_mean = arrays.get("node_mean")     # absent in bundles from before explanations
+        if self.node_mean is not None:
+            self.path_feature, self.path_delta = self._paths()
+
+    def _paths(self) -> tuple:
+        """
+        For every node, the (feature, change in node mean) of each split on
+        the way down from its root – (n_nodes, max_depth), zero-padded – so
+        a leaf id is all contributions() needs.
+        """
+        n = len(self.left)
+        parent = np.full(n, -1, dtype=np.intp)
+        internal = np.flatnonzero(np.asarray(self.left) >= 0)
+        parent[self.left[internal]] = internal
+        parent[self.right[internal]] = internal
+
+        feature = np.zeros((n, self.max_depth), dtype=np.intp)
+        delta = np.zeros((n, self.max_depth))
+        node = np.arange(n)
+        for d in range(self.max_depth):
+            up = parent[node]
+            has = up >= 0
+            feature[has, d] = self.feature[up[has]]
+            delta[has, d] = self.node_mean[node[has]] - self.node_mean[up[has]]
+            node = np.where(has, up, node)
+        return feature, delta
+
+    def apply(self, X) -> np.ndarray:
+        """(n_rows, n_trees) leaf node ids – all trees walked together, one level per step."""
+        cells = _Cells(X)
+        rows = np.arange(cells.n_rows)[:, None]
+        node = np.broadcast_to(self.roots, (cells.n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            go_left = cells[rows, np.maximum(self.feature[node], 0)] <= self.threshold[node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.right[node]))
+        return node
+
+    def decision_function(self, X, leaves: Optional[np.ndarray] = None) -> np.ndarray:
+        leaf_values = self.value[self.apply(X) if leaves is None else leaves]
+        raw = np.full(len(leaf_values), self.init_raw)
+        for t in range(leaf_values.shape[1]):        # stage order, as sklearn adds them
+            raw += self.learning_rate * leaf_values[:, t]
+        return raw
+
+    def predict_proba(self, X, leaves: Optional[np.ndarray] = None) -> np.ndarray:
+        p = expit(self.decision_function(X, leaves))
+        return np.column_stack([1 - p, p])
+
+    def contributions(self, X, leaves: Optional[np.ndarray] = None) -> tuple:
+        """
+        Path contributions in log-odds: every split on a row's path credits
+        its feature with the change in node mean. Returns (bias,
+        (n_rows, n_features) contributions); bias + row sum equals
+        decision_function. Pass the `leaves` from apply() to skip the walk.
+        """
+        leaves = self.apply(X) if leaves is None else leaves
+        n, n_features = len(leaves), X.shape[1]
+        rows = np.arange(n)[:, None, None]
+        flat = np.bincount((rows * n_features + self.path_feature[leaves]).ravel(),
+                           weights=self.path_delta[leaves].ravel(), minlength=n * n_features)
+        bias = self.init_raw + self.learning_rate * self.node_mean[self.roots].sum()
+        return bias, self.learning_rate * flat.reshape(n, n_features)
+
+
+class CoxServing:
+    """predict_median of a fitted (unstratified) lifelines CoxPHFitter."""
+
+    def __init__(self, meta: dict, arrays: dict):
+        self.param_names = meta["param_names"]
+        for name in ("params", "norm_mean", "param_idx", "bh_times", "bh_cumhaz"):
+            setattr(self, name, arrays[name])
+
+    def predict_partial_hazard(self, X) -> np.ndarray:
+        """exp((x - mean)·β), as a sparse dot product when X is sparse."""
+        if issparse(X):
+            X = csr_matrix(X)[:, self.param_idx]
+            return np.exp(X @ self.params - np.dot(self.norm_mean, self.params))
+        X = np.asarray(X, dtype=float)[:, self.param_idx]
+        return np.exp(np.dot(X - self.norm_mean, self.params))
+
+    def contributions(self, X) -> np.ndarray:
+        """(x - mean)·β per coefficient, (n_rows, n_params); row sums are the log partial hazard."""
+        X = X[:, self.param_idx]
+        X = X.toarray() if issparse(X) else np.asarray(X, dtype=float)
+        return (X - self.norm_mean) * self.params
+
+    def predict_median(self, X) -> np.ndarray:
+        """
+        First baseline time where S(t) = exp(-H0(t)·hazard) ≤ 0.5, inf if never –
+        lifelines' rule, found by binary search on H0 instead of building the
+        full survival curve for every row.
+        """
+        ph = self.predict_partial_hazard(X)
+        H0 = self.bh_cumhaz
+        last = len(H0) - 1
+        surv = lambda k: np.exp(-(H0[k] * ph))
+
+        with np.errstate(divide="ignore", over="ignore"):
+            k = np.clip(np.searchsorted(H0, LN2 / ph, side="left"), 0, last)
+        # settle rounding at the boundary with the exact comparison
+        for _ in range(2):
+            back = (k > 0) & (surv(np.maximum(k - 1, 0)) <= 0.5)
+            k = np.where(back, k - 1, k)
+            fwd = (k < last) & (surv(k) > 0.5)
+            k = np.where(fwd, k + 1, k)
+        return np.where(surv(k) > 0.5, np.inf, self.bh_times[k])
+
+
+# ------------------------------------------------------------------
+# Loading
+_MODEL_CLASSES = {"gbm_binary": TreeEnsemble, "cox_ph": CoxServing}
+
+
+def load_bundle(path: pathlib.Path) -> Optional[dict]:
+    """
+    {"pre": ServingPreprocessor, "model": TreeEnsemble | CoxServing, "meta": …}
+    for a bundle directory, or None if there is none (or it is from an
+    unknown format version).
+    """
+    path = pathlib.Path(path)
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    if meta.get("format") != FORMAT_VERSION or meta.get("kind") not in _MODEL_CLASSES:
+        return None
+
+    # plain ndarray views of the maps – np.memmap adds overhead to every fancy index
+    arrays = {name: np.asarray(np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False))
+              for name in meta["arrays"]}
+    return {
+        "pre":   ServingPreprocessor(meta, arrays),
+        "model": _MODEL_CLASSES[meta["kind"]](meta, arrays),
+        "meta":  meta,
+    }
@@ -3,4 +3,6 @@ import os
 
 HIGH    = float(os.getenv("THRESHOLD_HIGH", 0.70))
 MEDIUM  = float(os.getenv("THRESHOLD_MEDIUM", 0.30))
+if MEDIUM > HIGH:                    # fail at start-up, not in the middle of a scoring run
+    raise ValueError(f"THRESHOLD_MEDIUM {MEDIUM} is above THRESHOLD_HIGH {HIGH}")
 ALERT_CHANNELS = ["email", "slack"]
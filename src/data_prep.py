@@ -1,11 +1,15 @@
 # Fixed src/data_prep.py
 
+import logging
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
+from logger import get_logger
+
+log = get_logger(__name__)
 
 NUM_COLS = [
     "age", "waiting_days", "total_leave_days",
@@ -20,34 +24,31 @@ TENURE_TARGET = "tenure_days"
 
 def load(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
-    print(f"📊 Loaded CSV with shape: {df.shape}")
-    print(f"📋 Columns: {list(df.columns)}")
-    
-    # Debug: Check tenure_days column
-    if TENURE_TARGET in df.columns:
-        print(f"🔍 tenure_days info:")
-        print(f"  - Data type: {df[TENURE_TARGET].dtype}")
-        print(f"  - Unique values sample: {df[TENURE_TARGET].unique()[:10]}")
-        print(f"  - NaN count: {df[TENURE_TARGET].isna().sum()}")
-        print(f"  - Rows with tenure_days <= 20: {(df[TENURE_TARGET] <= 20).sum()}")
-    else:
-        print(f"❌ Column '{TENURE_TARGET}' not found in CSV!")
-        print(f"Available columns: {list(df.columns)}")
-    
+    log.info("📊 Loaded CSV with shape: %s", df.shape)
+
+    # Diagnostics below scan whole columns – only pay for them at DEBUG
+    if TENURE_TARGET not in df.columns:
+        log.error("❌ Column '%s' not found in CSV! Available columns: %s",
+                  TENURE_TARGET, list(df.columns))
+    elif log.isEnabledFor(logging.DEBUG):
+        tenure = df[TENURE_TARGET]
+        log.debug("📋 Columns: %s", list(df.columns))
+        log.debug("🔍 tenure_days info: dtype=%s, sample=%s, NaN=%d, <=20: %d",
+                  tenure.dtype, tenure.unique()[:10], tenure.isna().sum(),
+                  (tenure <= 20).sum())
+
     return df
 
 def clean(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     
-    print(f"🧹 Starting clean process with {len(df)} rows")
+    log.info("🧹 Starting clean process with %d rows", len(df))
     
-    # Debug: Check tenure_days before filtering
     if TENURE_TARGET in df.columns:
-        print(f"🔍 Before filtering - tenure_days stats:")
-        print(f"  - Count: {df[TENURE_TARGET].notna().sum()}")
-        print(f"  - Min: {df[TENURE_TARGET].min()}")
-        print(f"  - Max: {df[TENURE_TARGET].max()}")
-        print(f"  - Rows with <= 20: {(df[TENURE_TARGET] <= 20).sum()}")
+        if log.isEnabledFor(logging.DEBUG):
+            tenure = df[TENURE_TARGET]
+            log.debug("🔍 Before filtering - tenure_days count=%d, min=%s, max=%s, <=20: %d",
+                      tenure.notna().sum(), tenure.min(), tenure.max(), (tenure <= 20).sum())
         
         # Convert to numeric if it's not already (handles string numbers)
         df[TENURE_TARGET] = pd.to_numeric(df[TENURE_TARGET], errors='coerce')
@@ -57,10 +58,10 @@ def clean(df: pd.DataFrame) -> pd.DataFrame:
         df = df[df[TENURE_TARGET] > 20].copy()
         filtered_count = len(df)
         
-        print(f"✅ Filtered out {initial_count - filtered_count} rows with tenure_days <= 20")
-        print(f"📊 Remaining rows: {filtered_count}")
+        log.info("✅ Filtered out %d rows with tenure_days <= 20, %d remaining",
+                 initial_count - filtered_count, filtered_count)
     else:
-        print(f"❌ Cannot filter - '{TENURE_TARGET}' column not found!")
+        log.error("❌ Cannot filter - '%s' column not found!", TENURE_TARGET)
         return df
     
     # Keep rows that have target for churn task
@@ -68,7 +69,8 @@ def clean(df: pd.DataFrame) -> pd.DataFrame:
         before_target_filter = len(df)
         df = df[df[TARGET].notna()]
         after_target_filter = len(df)
-        print(f"🎯 Filtered for valid churn labels: {before_target_filter} → {after_target_filter}")
+        log.info("🎯 Filtered for valid churn labels: %d → %d",
+                 before_target_filter, after_target_filter)
     
     # Basic sanity fixes
     if "age" in df.columns:
@@ -90,14 +92,13 @@ def clean(df: pd.DataFrame) -> pd.DataFrame:
         tenure_for_ratio = df[TENURE_TARGET].fillna(0) + 1  # Add 1 only for this calculation
         df["leave_ratio"] = df["total_leave_days"].fillna(0) / tenure_for_ratio
     
-    print(f"✅ Clean process completed. Final shape: {df.shape}")
+    log.info("✅ Clean process completed. Final shape: %s", df.shape)
     
     # VERIFICATION: Check that tenure_days wasn't modified
-    if TENURE_TARGET in df.columns:
-        print(f"🔍 After cleaning - tenure_days verification:")
-        print(f"  - Min: {df[TENURE_TARGET].min()}")
-        print(f"  - Max: {df[TENURE_TARGET].max()}")
-        print(f"  - Sample values: {df[TENURE_TARGET].head(10).tolist()}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("🔍 After cleaning - tenure_days min=%s, max=%s, sample=%s",
+                  df[TENURE_TARGET].min(), df[TENURE_TARGET].max(),
+                  df[TENURE_TARGET].head(10).tolist())
     
     return df
 
@@ -113,5 +114,6 @@ def make_preprocessor() -> ColumnTransformer:
     return ColumnTransformer(
         [("num", num_proc, NUM_COLS + ["is_active_2025", "leave_ratio"]),
          ("cat", cat_proc, CAT_COLS)],
-        remainder="drop"
+        remainder="drop",
+        sparse_threshold=1.0            # always CSR – one-hot columns stay sparse
     )
\ No newline at end of file
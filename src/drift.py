@@ -0,0 +1,147 @@
+# src/drift.py
+"""
+Input drift between the training data and the rows being scored.
+
+At training time build_reference() condenses the training inputs into a
+compact sketch that is stored in the churn serving bundle (meta.json):
+
+    NUM_COLS   decile bin edges + row counts per bin (+ missing)
+    CAT_COLS   counts of the most frequent categories (+ other, missing)
+
+At scoring time a DriftMonitor is fed chunk by chunk. It only bins the
+chunk into the same buckets and adds the counts – raw rows are not kept –
+and report() compares the two histograms per feature:
+
+    PSI   Σ (actual − expected) · ln(actual / expected)   < 0.1 stable,
+          0.1–0.25 moderate, > 0.25 major shift
+    KS    largest gap between the binned CDFs (numeric features only)
+
+When any feature reaches DRIFT_PSI_RETRAIN (default 0.25) the report asks
+for retraining.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from data_prep import NUM_COLS, CAT_COLS
+
+PSI_RETRAIN    = float(os.getenv("DRIFT_PSI_RETRAIN", 0.25))
+PSI_MODERATE   = 0.10
+N_BINS         = 10            # deciles of the training data
+MAX_CATEGORIES = 50            # rarer training categories are pooled into "other"
+EPS            = 1e-4          # floor for empty bins so PSI stays finite
+
+
+# ------------------------------------------------------------------
+# Binning shared by training and scoring
+def _num_counts(values, edges: np.ndarray) -> np.ndarray:
+    """Counts per bin (len(edges) + 1 bins, value == edge goes low) + a missing count."""
+    x = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    missing = np.isnan(x)
+    bins = np.searchsorted(edges, x[~missing], side="left")
+    counts = np.bincount(bins, minlength=len(edges) + 1)
+    return np.append(counts, missing.sum())
+
+
+def _cat_counts(values, categories: list) -> np.ndarray:
+    """Counts per known category, then "other", then missing."""
+    s = pd.Series(values)
+    missing = s.isna().to_numpy()
+    codes = pd.Categorical(s[~missing].astype(str), categories=categories).codes
+    counts = np.bincount(np.where(codes < 0, len(categories), codes), minlength=len(categories) + 1)
+    return np.append(counts, missing.sum())
+
+
+def build_reference(df: pd.DataFrame) -> dict:
+    """Sketch of the training inputs (JSON-serialisable, a few KB)."""
+    ref = {"rows": len(df), "num": {}, "cat": {}}
+    for col in NUM_COLS:
+        if col not in df:
+            continue
+        x = pd.to_numeric(df[col], errors="coerce").dropna().to_numpy(dtype=float)
+        edges = np.unique(np.quantile(x, np.arange(1, N_BINS) / N_BINS)) if len(x) else np.array([])
+        ref["num"][col] = {"edges": edges.tolist(),
+                           "counts": _num_counts(df[col], edges).tolist()}
+    for col in CAT_COLS:
+        if col not in df:
+            continue
+        top = df[col].dropna().astype(str).value_counts().index[:MAX_CATEGORIES].tolist()
+        ref["cat"][col] = {"categories": top, "counts": _cat_counts(df[col], top).tolist()}
+    return ref
+
+
+# ------------------------------------------------------------------
+def psi(expected, actual) -> float:
+    e = np.asarray(expected, dtype=float)
+    a = np.asarray(actual, dtype=float)
+    if e.sum() == 0 or a.sum() == 0:
+        return 0.0
+    e = np.maximum(e / e.sum(), EPS)
+    a = np.maximum(a / a.sum(), EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual) -> float:
+    """Max CDF gap over the ordered (non-missing) bins."""
+    e = np.asarray(expected, dtype=float)
+    a = np.asarray(actual, dtype=float)
+    if e.sum() == 0 or a.sum() == 0:
+        return 0.0
+    return float(np.max(np.abs(np.cumsum(e) / e.sum() - np.cumsum(a) / a.sum())))
+
+
+class DriftMonitor:
+    """Accumulates binned counts of scored chunks against a training reference."""
+
+    def __init__(self, reference: dict, psi_retrain: Optional[float] = None):
+        self.reference = reference
+        self.psi_retrain = PSI_RETRAIN if psi_retrain is None else psi_retrain
+        self.rows = 0
+        self.num = {c: (np.asarray(r["edges"], dtype=float), np.zeros(len(r["counts"]), np.int64))
+                    for c, r in reference["num"].items()}
+        self.cat = {c: (r["categories"], np.zeros(len(r["counts"]), np.int64))
+                    for c, r in reference["cat"].items()}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Add one chunk of raw input rows (missing columns count as missing)."""
+        self.rows += len(chunk)
+        empty = pd.Series(np.nan, index=chunk.index)
+        for col, (edges, counts) in self.num.items():
+            counts += _num_counts(chunk.get(col, empty), edges)
+        for col, (categories, counts) in self.cat.items():
+            counts += _cat_counts(chunk.get(col, empty), categories)
+
+    def report(self) -> dict:
+        """Per-feature PSI / KS, the worst feature and whether to retrain."""
+        features = {}
+        for col, (_, counts) in self.num.items():
+            ref = np.asarray(self.reference["num"][col]["counts"])
+            features[col] = {
+                "psi": round(psi(ref, counts), 4),
+                "ks":  round(ks(ref[:-1], counts[:-1]), 4),
+                "missing_share": round(float(counts[-1]) / max(self.rows, 1), 4),
+            }
+        for col, (_, counts) in self.cat.items():
+            ref = np.asarray(self.reference["cat"][col]["counts"])
+            features[col] = {
+                "psi": round(psi(ref, counts), 4),
+                "other_share": round(float(counts[-2]) / max(self.rows, 1), 4),
+                "missing_share": round(float(counts[-1]) / max(self.rows, 1), 4),
+            }
+
+        worst = max(features, key=lambda c: features[c]["psi"]) if features else None
+        max_psi = features[worst]["psi"] if worst else 0.0
+        return {
+            "rows":          self.rows,
+            "reference_rows": self.reference["rows"],
+            "max_psi":       max_psi,
+            "max_psi_feature": worst,
+            "moderate":      sorted(c for c, f in features.items()
+                                    if PSI_MODERATE <= f["psi"] < self.psi_retrain),
+            "drifted":       sorted(c for c, f in features.items() if f["psi"] >= self.psi_retrain),
+            "psi_retrain":   self.psi_retrain,
+            "retrain":       max_psi >= self.psi_retrain,
+            "features":      features,
+        }
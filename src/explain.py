@@ -0,0 +1,67 @@
+# src/explain.py
+"""
+Top risk drivers per caregiver, from the serving bundles.
+
+    churn_drivers    GBM path contributions (log-odds): which inputs pushed
+                     the churn probability up
+    tenure_drivers   Cox contributions (x − training mean)·β (log hazard):
+                     which inputs shorten the expected tenure
+
+Contributions of one-hot columns are summed back to their input column
+(home_province, salary_band, …), and each row gets the TOP_K inputs with
+the largest positive contribution as "incidents +0.82; rank +0.31".
+Both work on the already encoded chunk (and, for the GBM, on the leaf
+ids of the scoring pass); score.py only asks for the HIGH/MEDIUM rows.
+"""
+import numpy as np
+
+TOP_K     = 3
+MIN_SHOWN = 0.005      # smaller contributions round to +0.00 and are left out
+
+
+def _by_column(contrib: np.ndarray, index: np.ndarray, n_groups: int) -> np.ndarray:
+    """Sum feature contributions (n_rows, n_features) into input columns (n_rows, n_groups)."""
+    n = contrib.shape[0]
+    keys = (np.arange(n)[:, None] * n_groups + index).ravel()
+    return np.bincount(keys, weights=contrib.ravel(), minlength=n * n_groups).reshape(n, n_groups)
+
+
+def format_drivers(contrib: np.ndarray, names: list, k: int = TOP_K) -> np.ndarray:
+    """Top-k positive contributions per row as text ("" when nothing noticeably raises the risk)."""
+    if not len(contrib):
+        return np.array([], dtype=object)
+    k = min(k, contrib.shape[1])
+    top = np.argsort(-contrib, axis=1, kind="stable")[:, :k]
+    cents = np.rint(np.take_along_axis(contrib, top, axis=1) * 100).astype(np.int64)
+    shown = cents > 0                 # i.e. the contribution is at least MIN_SHOWN
+
+    # the values repeat a lot – format each distinct one once, then build the texts column-wise
+    values, inverse = np.unique(np.where(shown, cents, 0), return_inverse=True)
+    labels = np.array([f" +{c / 100:.2f}" for c in values], dtype=object)
+    pieces = np.asarray(names, dtype=object)[top] + labels[inverse.reshape(top.shape)]
+    out = np.where(shown[:, 0], pieces[:, 0], "")
+    for i in range(1, k):
+        # sorted descending, so shown entries are always a prefix of the row
+        out = np.where(shown[:, i], out + "; " + pieces[:, i], out)
+    return out
+
+
+def available(bundle: dict) -> bool:
+    """Explanations need a serving bundle (the pickled models carry no node means)."""
+    model = bundle.get("model")
+    return "meta" in bundle and getattr(model, "node_mean", True) is not None
+
+
+def churn_drivers(bundle: dict, X, leaves=None, k: int = TOP_K) -> np.ndarray:
+    """Drivers for encoded rows `X` (leaves from the same rows' apply(), if at hand)."""
+    _, contrib = bundle["model"].contributions(X, leaves)
+    names, index = bundle["pre"].feature_groups()
+    return format_drivers(_by_column(contrib, index, len(names)), names, k)
+
+
+def tenure_drivers(bundle: dict, X, k: int = TOP_K) -> np.ndarray:
+    """Drivers for encoded rows `X`."""
+    model = bundle["model"]
+    names, index = bundle["pre"].feature_groups()
+    return format_drivers(_by_column(model.contributions(X), index[model.param_idx], len(names)),
+                          names, k)
@@ -0,0 +1,165 @@
+# src/feature_cache.py
+"""
+Encoded training features, cached on disk.
+
+Both training scripts (and the tuning runs) need the same thing: the
+processed CSV, cleaned, with a make_preprocessor() fitted and applied to
+it. load_features() does that once and stores the result under
+data/feature_cache/<key>/:
+
+    X.npz          CSR feature matrix (scipy.sparse.save_npz)
+    columns.npz    caregiver_id, churn_label, tenure_days per row
+    meta.json      feature names, raw input columns, drift reference
+    pre.joblib     the fitted preprocessor
+
+The key is a hash of the CSV bytes and the preprocessor configuration, so
+a new download or a change to make_preprocessor() builds a fresh entry and
+everything else loads in milliseconds.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+from dataclasses import dataclass
+
+import joblib
+import numpy as np
+import sklearn
+from scipy.sparse import csr_matrix, load_npz, save_npz
+
+from data_prep import load, clean, make_preprocessor, NUM_COLS, CAT_COLS, TARGET, TENURE_TARGET
+from drift import build_reference
+from logger import get_logger
+
+log = get_logger(__name__)
+
+ROOT        = pathlib.Path(__file__).resolve().parents[1]
+DATA        = ROOT / "data" / "Caregiver Prediction - Processed_Data.csv"
+CACHE_DIR   = ROOT / "data" / "feature_cache"
+CACHE_VERSION = 2          # bump when clean() changes what it produces
+MAX_ENTRIES   = 3          # older cache entries are removed
+
+
+@dataclass
+class FeatureSet:
+    X:             csr_matrix       # encoded features, one row per cleaned caregiver
+    feature_names: np.ndarray
+    raw_columns:   list             # input columns the preprocessor was fitted on
+    caregiver_id:  np.ndarray
+    churn_label:   np.ndarray
+    tenure_days:   np.ndarray
+    pre:           object           # fitted make_preprocessor()
+    reference:     dict             # drift sketch of the raw inputs (drift.build_reference)
+    key:           str
+
+
+def cache_key(path: pathlib.Path = DATA) -> str:
+    """Hash of the CSV contents + preprocessor config + library version."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    config = {
+        "version":      CACHE_VERSION,
+        "sklearn":      sklearn.__version__,
+        "num_cols":     NUM_COLS,
+        "cat_cols":     CAT_COLS,
+        "preprocessor": repr(make_preprocessor().get_params(deep=True)),
+    }
+    h.update(json.dumps(config, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def _build(path: pathlib.Path, key: str) -> FeatureSet:
+    df = clean(load(str(path)))
+    raw = df.drop(columns=[TARGET, "caregiver_id"])
+
+    pre = make_preprocessor()
+    X = csr_matrix(pre.fit_transform(raw), dtype=float)
+    return FeatureSet(
+        X             = X,
+        feature_names = np.asarray(pre.get_feature_names_out()).astype(str),
+        raw_columns   = raw.columns.tolist(),
+        caregiver_id  = df["caregiver_id"].astype(str).to_numpy(dtype=str),
+        churn_label   = df[TARGET].to_numpy(dtype=int),
+        tenure_days   = df[TENURE_TARGET].to_numpy(dtype=float),
+        pre           = pre,
+        reference     = build_reference(raw),
+        key           = key,
+    )
+
+
+def _save(fs: FeatureSet, entry: pathlib.Path) -> None:
+    """Write an entry next to its final place, then rename it in."""
+    tmp = entry.with_name(f"{entry.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    save_npz(tmp / "X.npz", fs.X)
+    np.savez(tmp / "columns.npz", caregiver_id=fs.caregiver_id,
+             churn_label=fs.churn_label, tenure_days=fs.tenure_days)
+    joblib.dump(fs.pre, tmp / "pre.joblib")
+    (tmp / "meta.json").write_text(json.dumps({
+        "feature_names": fs.feature_names.tolist(),
+        "raw_columns":   fs.raw_columns,
+        "reference":     fs.reference,
+    }, indent=1))
+
+    try:
+        tmp.rename(entry)
+    except OSError:                 # another process saved the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load(entry: pathlib.Path, key: str) -> FeatureSet:
+    meta = json.loads((entry / "meta.json").read_text())
+    with np.load(entry / "columns.npz", allow_pickle=False) as cols:
+        columns = {k: cols[k] for k in cols.files}
+    return FeatureSet(
+        X             = load_npz(entry / "X.npz").tocsr(),
+        feature_names = np.array(meta["feature_names"]),
+        raw_columns   = meta["raw_columns"],
+        reference     = meta["reference"],
+        pre           = joblib.load(entry / "pre.joblib"),
+        key           = key,
+        **columns,
+    )
+
+
+def _prune(keep: pathlib.Path) -> None:
+    """Keep only the MAX_ENTRIES most recently used entries."""
+    entries = sorted((p for p in CACHE_DIR.iterdir() if p.is_dir() and "." not in p.name),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[MAX_ENTRIES:]:
+        if old != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def load_features(path: pathlib.Path = DATA, use_cache: bool = True) -> FeatureSet:
+    """Cleaned + encoded training features for `path`, from the cache when possible."""
+    path = pathlib.Path(path)
+    key = cache_key(path)
+    entry = CACHE_DIR / key
+
+    if use_cache and (entry / "meta.json").exists():
+        try:
+            fs = _load(entry, key)
+            os.utime(entry)                           # mark as recently used
+            log.info("⚡ Loaded cached features %s (%d × %d)", key, *fs.X.shape)
+            return fs
+        except Exception as e:
+            log.warning("⚠️ Feature cache %s unreadable (%s) – rebuilding", key, e)
+            shutil.rmtree(entry, ignore_errors=True)
+
+    fs = _build(path, key)
+    if use_cache:
+        _save(fs, entry)
+        _prune(entry)
+        log.info("💾 Cached features %s (%d × %d)", key, *fs.X.shape)
+    return fs
+
+
+def clear_cache() -> None:
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
@@ -0,0 +1,195 @@
+# src/history.py
+"""
+Prediction history across batch runs.
+
+Every generate_predictions() run is recorded in data/prediction_history.sqlite:
+
+    runs          one row per run (run_id, run_date, recorded_at): thresholds
+                  used and the roster-wide aggregates (risk counts, mean /
+                  p90 probability)
+    predictions   one row per (run_id, caregiver_id): churn_prob (0–1),
+                  risk_level, remaining_days
+
+The history is append-only: every run gets a new run_id, and a rerun on
+the same day is stored next to the earlier one instead of replacing it.
+Readers use the latest run of each run date. Per-caregiver trajectories
+use the (caregiver_id, run_date, run_id) index, and roster trends only
+read `runs`, so both stay fast after years of daily runs.
+
+    python src/history.py trajectory WC-1840 --days 90
+    python src/history.py trend --days 365
+"""
+import argparse
+import datetime as dt
+import pathlib
+import sqlite3
+from contextlib import closing
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from postprocess import thresholds
+
+ROOT         = pathlib.Path(__file__).resolve().parents[1]
+DATA_DIR     = ROOT / "data"
+HISTORY_PATH = DATA_DIR / "prediction_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_date     TEXT NOT NULL,
+    recorded_at  TEXT NOT NULL,
+    threshold_high   REAL,
+    threshold_medium REAL,
+    n_rows       INTEGER,
+    n_high       INTEGER,
+    n_medium     INTEGER,
+    n_low        INTEGER,
+    n_error      INTEGER,
+    mean_prob    REAL,
+    p90_prob     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (run_date, run_id);
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id          INTEGER NOT NULL,
+    run_date        TEXT NOT NULL,
+    caregiver_id    TEXT NOT NULL,
+    churn_prob      REAL,
+    risk_level      TEXT,
+    remaining_days  REAL,
+    PRIMARY KEY (run_id, caregiver_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_predictions_caregiver_run ON predictions (caregiver_id, run_date, run_id);
+"""
+RUN_COLS = ("run_date, recorded_at, threshold_high, threshold_medium, n_rows, n_high, n_medium, "
+            "n_low, n_error, mean_prob, p90_prob")
+LATEST = "SELECT MAX(run_id) FROM runs GROUP BY run_date"      # the run each date is read from
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Histories from before run ids (one partition per date): every date becomes one run."""
+    if not conn.execute("SELECT 1 FROM pragma_table_info('runs') WHERE name = 'run_date'").fetchone():
+        return                                                    # new file
+    if conn.execute("SELECT 1 FROM pragma_table_info('runs') WHERE name = 'run_id'").fetchone():
+        return                                                    # current schema
+    with conn:
+        conn.execute("ALTER TABLE runs RENAME TO runs_v1")
+        conn.execute("ALTER TABLE predictions RENAME TO predictions_v1")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        conn.execute(f"INSERT INTO runs ({RUN_COLS}) SELECT {RUN_COLS} FROM runs_v1 ORDER BY run_date")
+        conn.execute("INSERT INTO predictions SELECT r.run_id, p.run_date, p.caregiver_id, p.churn_prob, "
+                     "p.risk_level, p.remaining_days FROM predictions_v1 p JOIN runs r USING (run_date)")
+        conn.execute("DROP TABLE predictions_v1")
+        conn.execute("DROP TABLE runs_v1")
+
+
+def _connect(path: pathlib.Path) -> sqlite3.Connection:
+    path.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")        # readers don't block the nightly write
+    _migrate(conn)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _since(days: Optional[int], end: Optional[dt.date]) -> tuple:
+    end = end or dt.date.today()
+    start = dt.date.min if days is None else end - dt.timedelta(days=days)
+    return str(start), str(end)
+
+
+# ------------------------------------------------------------------
+def record_run(raw: pd.DataFrame, preds: pd.DataFrame, run_date: dt.date,
+               high: Optional[float] = None, medium: Optional[float] = None,
+               path: pathlib.Path = HISTORY_PATH) -> int:
+    """
+    Append one run: `raw` from score_df_raw (churn_prob, remaining_days)
+    and `preds` from finalize() on it (risk_level), row-aligned. Returns the
+    number of caregivers recorded (a caregiver listed twice counts once,
+    with its last row, in the rows and in the aggregates).
+    """
+    run = str(run_date)
+    probs = raw["churn_prob"].to_numpy(dtype=float)
+    levels = preds["risk_level"].to_numpy()
+    if "error" in raw:
+        probs = np.where(raw["error"].notna().to_numpy(), np.nan, probs)
+
+    rows = pd.DataFrame({
+        "caregiver_id":   raw["caregiver_id"].astype(str).to_numpy(),
+        "churn_prob":     probs,
+        "risk_level":     levels,
+        "remaining_days": raw["remaining_days"].to_numpy(dtype=float),
+    }).drop_duplicates("caregiver_id", keep="last")
+
+    probs = rows["churn_prob"].to_numpy()
+    valid = probs[~np.isnan(probs)]
+    counts = rows["risk_level"].value_counts()
+    t = thresholds(high, medium)
+    summary = (
+        run, dt.datetime.now().isoformat(timespec="seconds"), t["HIGH"], t["MEDIUM"], len(rows),
+        int(counts.get("HIGH", 0)), int(counts.get("MEDIUM", 0)),
+        int(counts.get("LOW", 0)), int(counts.get("ERROR", 0)),
+        float(valid.mean()) if len(valid) else None,
+        float(np.quantile(valid, 0.9)) if len(valid) else None,
+    )
+
+    with closing(_connect(path)) as conn, conn:           # one transaction
+        run_id = conn.execute(f"INSERT INTO runs ({RUN_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              summary).lastrowid
+        records = [
+            (run_id, run, cid, None if np.isnan(p) else float(p), lvl, None if np.isnan(d) else float(d))
+            for cid, p, lvl, d in rows.itertuples(index=False, name=None)
+        ]
+        conn.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", records)
+    return len(records)
+
+
+def trajectory(caregiver_id: str, days: Optional[int] = 90, end: Optional[dt.date] = None,
+               path: pathlib.Path = HISTORY_PATH) -> pd.DataFrame:
+    """One caregiver's scores per run date (latest run of each) over the last `days` days (None → all)."""
+    start, stop = _since(days, end)
+    with closing(_connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT run_date, churn_prob, risk_level, remaining_days FROM predictions "
+            f"WHERE caregiver_id = ? AND run_date BETWEEN ? AND ? AND run_id IN ({LATEST}) "
+            "ORDER BY run_date",
+            conn, params=(caregiver_id, start, stop),
+        )
+
+
+def trend(days: Optional[int] = 90, end: Optional[dt.date] = None,
+          path: pathlib.Path = HISTORY_PATH) -> pd.DataFrame:
+    """Roster-wide aggregates per run date (latest run of each) over the last `days` days (None → all)."""
+    start, stop = _since(days, end)
+    with closing(_connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT run_date, n_rows, n_high, n_medium, n_low, n_error, mean_prob, p90_prob, "
+            "threshold_high, threshold_medium FROM runs "
+            f"WHERE run_date BETWEEN ? AND ? AND run_id IN ({LATEST}) ORDER BY run_date",
+            conn, params=(start, stop),
+        )
+
+
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the prediction history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("trajectory", help="one caregiver's scores over time")
+    p.add_argument("caregiver_id")
+    p = sub.add_parser("trend", help="roster-wide risk counts per run")
+    for p in sub.choices.values():
+        p.add_argument("--days", type=int, default=90, help="look-back window (0 = all history)")
+        p.add_argument("--json", action="store_true", help="print JSON records")
+    args = parser.parse_args()
+
+    days = args.days or None
+    df = trajectory(args.caregiver_id, days) if args.command == "trajectory" else trend(days)
+    if args.json:
+        print(df.to_json(orient="records", indent=2))
+    elif df.empty:
+        print("No history for that selection.")
+    else:
+        print(df.to_string(index=False))
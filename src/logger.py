@@ -0,0 +1,164 @@
+# src/logger.py
+"""
+Shared logging setup for the pipeline, the API and the GUI.
+
+Every module asks for its logger through get_logger("<module>") so all
+records live under the "wecare" namespace and are configured in one place:
+
+  • LOG_LEVEL  (DEBUG / INFO / WARNING …)  – default INFO
+  • LOG_FORMAT ("text" or "json")          – json writes one object per line
+
+Repeated warnings/errors with the same message template (e.g. one failing
+row after another) are rate-limited, and the GUI reads records from a
+buffered feed instead of being called once per line.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+ROOT_NAME   = "wecare"
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# attributes every LogRecord has – anything else came in through `extra=`
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return the logger for a pipeline module (``src.score`` → ``wecare.score``)."""
+    name = name.rsplit(".", 1)[-1]
+    return logging.getLogger(f"{ROOT_NAME}.{name}")
+
+
+# ------------------------------------------------------------------
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra=` fields are kept as keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts":     self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level":  record.levelname,
+            "logger": record.name,
+            "msg":    record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `burst` WARNING+ records per message template in
+    every `window` seconds. The first record after a quiet window reports
+    how many similar records were dropped. The verdict is stored on the
+    record, so one instance can be shared by several handlers.
+    """
+
+    def __init__(self, burst: int = 5, window: float = 60.0):
+        super().__init__()
+        self.burst  = burst
+        self.window = window
+        self._seen  = {}                 # key -> (window_start, count, suppressed)
+        self._lock  = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        if hasattr(record, "_rate_ok"):
+            return record._rate_ok
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._seen.get(key, (now, 0, 0))
+            if now - start > self.window:
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+                start, count, suppressed = now, 0, 0
+
+            count += 1
+            allowed = count <= self.burst
+            if not allowed:
+                suppressed += 1
+            self._seen[key] = (start, count, suppressed)
+        record._rate_ok = allowed
+        return allowed
+
+
+class LogFeed(logging.Handler):
+    """
+    Buffers formatted records for a consumer that polls (the Tk main loop).
+    emit() never touches a widget, so it is safe to call from worker threads;
+    the oldest lines are dropped once `maxlen` is reached.
+    """
+
+    def __init__(self, level: int = logging.INFO, maxlen: int = 5000):
+        super().__init__(level)
+        self._lines = deque(maxlen=maxlen)
+        self.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%H:%M:%S"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self, max_lines: int = 500) -> List[str]:
+        """Pop up to `max_lines` buffered lines (oldest first)."""
+        out = []
+        while self._lines and len(out) < max_lines:
+            out.append(self._lines.popleft())
+        return out
+
+
+# ------------------------------------------------------------------
+def configure_logging(level: Optional[str] = None,
+                      json_format: Optional[bool] = None,
+                      logfile: Optional[str] = None,
+                      console: bool = True) -> logging.Logger:
+    """
+    (Re)configure the "wecare" logger. Safe to call more than once – the
+    handlers installed by a previous call are replaced, not duplicated.
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+    root = logging.getLogger(ROOT_NAME)
+    root.setLevel(level)
+    root.propagate = False
+
+    for handler in [h for h in root.handlers if getattr(h, "_wecare_managed", False)]:
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter  = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    rate_limit = RateLimitFilter()
+
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    if logfile:
+        handlers.append(logging.FileHandler(logfile, mode="a", encoding="utf-8"))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(rate_limit)
+        handler._wecare_managed = True
+        root.addHandler(handler)
+
+    return root
+
+
+def attach_feed(feed: LogFeed) -> LogFeed:
+    """Route "wecare" records into a LogFeed (used by the GUI)."""
+    feed.addFilter(RateLimitFilter())
+    logging.getLogger(ROOT_NAME).addHandler(feed)
+    return feed
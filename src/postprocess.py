@@ -0,0 +1,132 @@
+# src/postprocess.py
+"""
+Turns raw model output for a whole batch into the presentation columns.
+
+Scoring produces, per caregiver, a churn probability (0–1) and an estimate
+of the remaining days. Everything after that – risk buckets, the "-" rule,
+rounded days and ISO quit dates – is done here with array operations, so
+it can be re-run on stored probabilities with other thresholds or another
+reference date without touching the models.
+"""
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+RISK_LABELS   = np.array(["LOW", "MEDIUM", "HIGH"])
+DRIVER_COLS   = ["churn_drivers", "tenure_drivers"]
+MAX_REMAINING = 36500          # anything beyond 100 years is treated as unknown …
+FALLBACK_DAYS = 365            # … and replaced by one year
+
+
+def thresholds(high: Optional[float] = None, medium: Optional[float] = None) -> dict:
+    """
+    Thresholds to bucket with; unset values come from config (env vars,
+    checked when config is loaded). ValueError when MEDIUM is above HIGH.
+    """
+    t = {
+        "HIGH":   config.HIGH if high is None else float(high),
+        "MEDIUM": config.MEDIUM if medium is None else float(medium),
+    }
+    if t["MEDIUM"] > t["HIGH"]:
+        raise ValueError(f"MEDIUM threshold {t['MEDIUM']} is above HIGH {t['HIGH']}")
+    return t
+
+
+def risk_levels(probs, high: Optional[float] = None, medium: Optional[float] = None) -> np.ndarray:
+    """
+    Vectorised LOW / MEDIUM / HIGH for probabilities in 0–1 (NaN → "ERROR").
+    The thresholds are not checked here: config checks its own at start-up,
+    and callers taking thresholds from users check them via thresholds().
+    """
+    high   = config.HIGH if high is None else high
+    medium = config.MEDIUM if medium is None else medium
+    probs  = np.asarray(probs, dtype=float)
+    levels = RISK_LABELS[np.digitize(np.nan_to_num(probs), [medium, high])]
+    return np.where(np.isnan(probs), "ERROR", levels).astype(object)
+
+
+def remaining_days(est_total, tenure_days) -> np.ndarray:
+    """Estimated total tenure minus current tenure, clipped at 0; unusable values → 1 year."""
+    est_total   = np.asarray(est_total, dtype=float)
+    tenure_days = np.asarray(tenure_days, dtype=float)
+    with np.errstate(invalid="ignore"):
+        remaining = np.maximum(est_total - tenure_days, 0.0)
+        bad = ~np.isfinite(remaining) | (remaining > MAX_REMAINING)
+    return np.where(bad, FALLBACK_DAYS, remaining)
+
+
+def present(ids, probs, remaining, errors=None, drivers: Optional[dict] = None,
+            today: Optional[date] = None,
+            high: Optional[float] = None,
+            medium: Optional[float] = None) -> dict:
+    """
+    The prediction columns as arrays: finalize() without the DataFrame,
+    for callers that already hold the raw scores as arrays (the API's
+    single-caregiver path). `errors` marks rows that could not be scored;
+    `drivers` maps churn_drivers / tenure_drivers to their raw texts.
+    """
+    today     = today or date.today()
+    probs     = np.asarray(probs, dtype=float)
+    remaining = np.asarray(remaining, dtype=float)
+    errors    = np.zeros(len(probs), bool) if errors is None else np.asarray(errors, bool)
+
+    levels = risk_levels(np.where(errors, np.nan, probs), high, medium)
+
+    # ---------- PRESENTATION RULE ----------
+    # LOW risk or less than half a day left → "-"; otherwise whole days (0.4 → 1)
+    with np.errstate(invalid="ignore"):
+        show = (levels != "LOW") & ~errors & (remaining >= 0.5)
+    days = np.ceil(np.where(show, remaining, 0)).astype(np.int64)
+    dates = np.datetime_as_string(
+        np.datetime64(today, "D") + days.astype("timedelta64[D]"), unit="D"
+    )
+
+    days_col  = np.where(show, days.astype(object), "-").astype(object)
+    dates_col = np.where(show, dates.astype(object), "-").astype(object)
+    days_col[errors]  = None
+    dates_col[errors] = None
+
+    out = {
+        "caregiver_id":        np.asarray(ids, dtype=object),
+        "churn_probability":   np.where(errors, np.nan, np.round(probs * 100, 3)),
+        "risk_level":          levels,
+        "days_to_quit_est":    days_col,
+        "estimated_quit_date": dates_col,
+    }
+    for col in DRIVER_COLS:
+        if drivers and col in drivers:
+            texts = np.asarray(drivers[col], dtype=object)
+            texts = np.where(levels == "LOW", "-", np.where(pd.isna(texts), None, texts))
+            texts[errors] = None
+            out[col] = texts
+    return out
+
+
+def finalize(raw: pd.DataFrame,
+             today: Optional[date] = None,
+             high: Optional[float] = None,
+             medium: Optional[float] = None) -> pd.DataFrame:
+    """
+    Build the prediction table from raw scores.
+
+    `raw` needs caregiver_id, churn_prob (0–1) and remaining_days; an
+    optional `error` column marks rows that could not be scored, and
+    churn_drivers / tenure_drivers are passed through when present. `today`
+    is the reference date for quit dates (default: the date of the call).
+    """
+    errors = raw["error"].notna().to_numpy() if "error" in raw else np.zeros(len(raw), bool)
+    out = pd.DataFrame(present(
+        raw["caregiver_id"].to_numpy(),
+        raw["churn_prob"].to_numpy(dtype=float),
+        raw["remaining_days"].to_numpy(dtype=float),
+        errors,
+        {col: raw[col].to_numpy(dtype=object) for col in DRIVER_COLS if col in raw},
+        today, high, medium,
+    ))
+    if errors.any():
+        out["error"] = raw["error"].to_numpy()
+    return out
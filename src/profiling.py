@@ -0,0 +1,244 @@
+# src/profiling.py
+"""
+CPU and memory profiles per pipeline stage, for finding out why a run got slow.
+
+    python main.py --profile              full run, one profile per stage
+    python main.py --profile score        just one step
+    PROFILE_API=1 uvicorn api:app …       one profile per API request (api.py middleware)
+
+Profiling is off unless enable() was called (or PROFILE_API is set for the
+API); stage() / @profiled then cost one check. When on, each stage writes
+to data/profiles/<run>/:
+
+    NN_<stage>.pstats      cProfile stats (python -m pstats, snakeviz)
+    NN_<stage>.collapsed   sampled stacks, "root;…;leaf count" per line – the
+                           input format of flamegraph.pl and speedscope
+    NN_<stage>.mem.txt     tracemalloc peak and the lines holding the most
+                           memory at the end of the stage
+    summary.json           wall / CPU seconds and peak MiB per stage
+
+Stages don't nest: a stage entered inside another one (in the same thread)
+is part of the outer profile. tracemalloc is process-wide – it runs while
+any stage is active – so memory figures of concurrent stages overlap.
+
+A stage with all_threads=True (an API request, which parses on the event
+loop and scores in the thread pool) samples the stacks of every busy
+thread, each rooted at its thread name, and counts process CPU time; its
+.pstats still covers only the thread that opened it.
+
+A profiling failure is logged and never fails the stage itself.
+"""
+import cProfile
+import datetime as dt
+import functools
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from logger import get_logger
+
+log = get_logger(__name__)
+
+ROOT        = pathlib.Path(__file__).resolve().parents[1]
+PROFILE_DIR = ROOT / "data" / "profiles"
+
+SAMPLE_INTERVAL = 0.005        # seconds between stack samples for the flame graph
+IDLE_FILES      = ("threading.py", "queue.py", "selectors.py")   # a thread waiting here is idle
+TRACE_FRAMES    = 10           # stack depth tracemalloc keeps per allocation
+TOP_ALLOCATIONS = 20
+
+_run_dir: Optional[pathlib.Path] = None
+_local   = threading.local()   # per thread: is a stage active?
+_lock    = threading.Lock()    # stage numbering, summary.json, tracing count
+_count   = 0
+_tracers = 0                   # stages currently using tracemalloc
+_own_trace = False             # tracemalloc was started here (and is stopped here)
+
+
+def enable(label: str = "run", root: pathlib.Path = PROFILE_DIR) -> pathlib.Path:
+    """Profile every stage from now on; returns the directory the artifacts go to."""
+    global _run_dir, _count
+    _run_dir = root / f"{dt.datetime.now():%Y%m%d-%H%M%S}-{_safe(label)}"
+    _run_dir.mkdir(parents=True, exist_ok=True)
+    _count = 0
+    log.info("🔬 Profiling on – artifacts in %s", _run_dir)
+    return _run_dir
+
+
+def disable() -> None:
+    global _run_dir
+    _run_dir = None
+
+
+def enabled() -> bool:
+    return _run_dir is not None
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "stage"
+
+
+# ------------------------------------------------------------------
+class _StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack every SAMPLE_INTERVAL seconds – or,
+    with thread_id None, the stacks of all busy threads, rooted at their names.
+    """
+
+    def __init__(self, thread_id: Optional[int]):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                self._add(frames.get(self.thread_id))
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident != self.ident and os.path.basename(frame.f_code.co_filename) not in IDLE_FILES:
+                    self._add(frame, names.get(ident, "thread"))
+
+    def _add(self, frame, root: Optional[str] = None) -> None:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if root is not None:
+            stack.append(root)
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def _write(name: str, prof: Optional[cProfile.Profile], stacks: Counter, peak: int,
+           snapshot: Optional[tracemalloc.Snapshot], wall: float, cpu: float) -> None:
+    global _count
+    with _lock:
+        _count += 1
+        stem = _run_dir / f"{_count:02d}_{_safe(name)}"
+
+    if prof is not None:
+        prof.dump_stats(stem.with_suffix(".pstats"))
+    stem.with_suffix(".collapsed").write_text(
+        "".join(f"{stack} {n}\n" for stack, n in stacks.most_common()), encoding="utf-8")
+
+    top = []
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+        top = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    lines = [f"stage {name}: peak {peak / 2**20:.1f} MiB, wall {wall:.2f}s, cpu {cpu:.2f}s", "",
+             f"top {len(top)} lines by memory still allocated at the end of the stage:"]
+    lines += [f"{s.size / 2**20:9.2f} MiB  {s.count:8d} blocks  {s.traceback[0]}" for s in top]
+    stem.with_suffix(".mem.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    with _lock:
+        summary = _run_dir / "summary.json"
+        stages = json.loads(summary.read_text()) if summary.exists() else []
+        stages.append({"stage": name, "file": stem.name, "wall_s": round(wall, 3),
+                       "cpu_s": round(cpu, 3), "peak_mib": round(peak / 2**20, 1),
+                       "samples": sum(stacks.values())})
+        summary.write_text(json.dumps(stages, indent=2))
+    log.info("🔬 %s: %.2fs wall, %.2fs CPU, peak %.1f MiB → %s.*",
+             name, wall, cpu, peak / 2**20, stem.name)
+
+
+def _trace_start() -> None:
+    """tracemalloc is process-wide: the first active stage starts it, the last one stops it."""
+    global _tracers, _own_trace
+    with _lock:
+        if _tracers == 0:
+            _own_trace = not tracemalloc.is_tracing()      # someone else's tracing is left alone
+            if _own_trace:
+                tracemalloc.start(TRACE_FRAMES)
+        _tracers += 1
+        tracemalloc.reset_peak()
+
+
+def _trace_stop() -> None:
+    global _tracers
+    with _lock:
+        _tracers -= 1
+        if _tracers == 0 and _own_trace:
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name: str, all_threads: bool = False):
+    """
+    Profile the enclosed block as stage `name` (a no-op while profiling is
+    off). With `all_threads`, stacks and CPU time cover every thread.
+    """
+    if _run_dir is None or getattr(_local, "active", False):
+        yield
+        return
+
+    try:
+        _trace_start()
+    except Exception as e:                   # profiling never fails the work it watches
+        log.warning("⚠️ Could not profile %s: %s", name, e)
+        yield
+        return
+
+    _local.active = True
+    sampler = _StackSampler(None if all_threads else threading.get_ident())
+    prof = cProfile.Profile()
+    cpu_time = time.process_time if all_threads else time.thread_time
+    t0, c0 = time.perf_counter(), cpu_time()
+    sampler.start()
+    try:
+        prof.enable()
+    except Exception as e:                   # e.g. another profiler active in this thread
+        log.warning("⚠️ No CPU profile for %s: %s", name, e)
+        prof = None
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+        wall, cpu = time.perf_counter() - t0, cpu_time() - c0
+        stacks = sampler.stop()
+        try:
+            # taken before _trace_stop(), so tracing is still on whatever other stages do
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+        except Exception as e:
+            log.warning("⚠️ No memory profile for %s: %s", name, e)
+            peak, snapshot = 0, None
+        finally:
+            _trace_stop()
+            _local.active = False
+        try:
+            _write(name, prof, stacks, peak, snapshot, wall, cpu)
+        except Exception as e:
+            log.warning("⚠️ Could not write the %s profile: %s", name, e)
+
+
+def profiled(name: str):
+    """Decorator: run the function as stage `name` (checked per call, so enable() may come later)."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _run_dir is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
@@ -0,0 +1,80 @@
+# src/progress.py
+"""
+Progress events and cooperative cancellation for long pipeline stages.
+
+A worker thread passes a ProgressReporter down into training / scoring.
+The pipeline calls stage() / advance() as it goes and check() between
+chunks; the GUI reads ProgressEvent objects from `reporter.events` on the
+Tk main loop and calls cancel() from the Cancel button.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+class PipelineCancelled(BaseException):
+    """
+    Raised by ProgressReporter.check() once cancel() was requested.
+    Derives from BaseException (like KeyboardInterrupt) so the pipeline's
+    `except Exception` error handlers let it through to the caller.
+    """
+
+
+@dataclass
+class ProgressEvent:
+    kind: str                       # "stage" | "progress" | "done" | "error" | "cancelled"
+    stage: str = ""
+    done: int = 0
+    total: int = 0
+    eta_seconds: Optional[float] = None
+    message: str = ""
+
+
+class ProgressReporter:
+    """
+    Publishes ProgressEvent objects to a queue. With events=None nothing is
+    published, so callers that do not care about progress can still pass
+    one in (or let the pipeline create a silent one) at no cost.
+    """
+
+    def __init__(self, events: Optional[queue.Queue] = None):
+        self.events       = events
+        self._cancel      = threading.Event()
+        self._stage       = ""
+        self._stage_start = time.monotonic()
+
+    # ---------- publishing ----------
+    def _publish(self, event: ProgressEvent) -> None:
+        if self.events is not None:
+            self.events.put(event)
+
+    def stage(self, name: str, total: int = 0, message: str = "") -> None:
+        """Start a new stage; `total` > 0 makes it a counted (determinate) stage."""
+        self._stage       = name
+        self._stage_start = time.monotonic()
+        self._publish(ProgressEvent("stage", name, 0, total, None, message))
+
+    def advance(self, done: int, total: int, message: str = "") -> None:
+        """Report `done` of `total` units finished in the current stage, with an ETA."""
+        elapsed = time.monotonic() - self._stage_start
+        eta = elapsed / done * (total - done) if done else None
+        self._publish(ProgressEvent("progress", self._stage, done, total, eta, message))
+
+    def finish(self, kind: str, message: str = "") -> None:
+        """Publish the terminal event of a run ("done", "error" or "cancelled")."""
+        self._publish(ProgressEvent(kind, self._stage, message=message))
+
+    # ---------- cancellation ----------
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self) -> None:
+        """Raise PipelineCancelled if cancel() was called – use between chunks."""
+        if self._cancel.is_set():
+            raise PipelineCancelled(f"cancelled during {self._stage or 'pipeline'}")
@@ -1,135 +1,414 @@
-import joblib, pathlib, pandas as pd, numpy as np, math          # <<< NEW (math)
-from datetime import timedelta, date                             # <<< NEW (date)
-from config import HIGH, MEDIUM
+import joblib, pathlib, pandas as pd, numpy as np
+from datetime import date
 from scipy.sparse import issparse
+from typing import Optional
+from logger import get_logger
+from progress import ProgressReporter
+from postprocess import finalize, present, remaining_days, risk_levels
+from bundle import load_bundle
+from drift import DriftMonitor
+from validate import Validation, check, check_record, vocabulary
+import explain
+
+log = get_logger(__name__)
 
 ROOT        = pathlib.Path(__file__).resolve().parents[1]
 MODEL_DIR    = ROOT / "models"
-THRESHOLDS   = {"HIGH": HIGH, "MEDIUM": MEDIUM}
 
 # ------------------------------------------------------------------
-# Load once
-churn_bundle  = joblib.load(MODEL_DIR / "churn_model.joblib")
-tenure_bundle = joblib.load(MODEL_DIR / "tenure_model.joblib")
+# Load once, on first use – the memory-mapped serving bundle if training
+# wrote one, otherwise the pickled sklearn / lifelines objects
+def _load(name: str) -> dict:
+    bundle = load_bundle(MODEL_DIR / f"{name}_serving")
+    if bundle is not None:
+        log.debug("Loaded %s_serving bundle", name)
+        return bundle
+    return joblib.load(MODEL_DIR / f"{name}_model.joblib")
+
+churn_bundle  = None           # importing score stays cheap; see load_models()
+tenure_bundle = None
+_loaded_stamp = None           # _model_stamp() of the files the loaded models came from
+
+
+def _model_stamp() -> tuple:
+    """Modification times of the model files (a new bundle is a new directory, so a new meta.json)."""
+    paths = [MODEL_DIR / f"{name}{suffix}" for name in ("churn", "tenure")
+             for suffix in ("_serving/meta.json", "_model.joblib")]
+    return tuple(p.stat().st_mtime_ns if p.exists() else None for p in paths)
+
+
+def load_models(reload: bool = False) -> None:
+    """Load both models if not loaded yet – or again with `reload`."""
+    global churn_bundle, tenure_bundle, _loaded_stamp
+    if churn_bundle is not None and tenure_bundle is not None and not reload:
+        return
+    stamp = _model_stamp()                 # before loading: a write during the load shows up next time
+    churn, tenure = _load("churn"), _load("tenure")
+    churn_bundle, tenure_bundle, _loaded_stamp = churn, tenure, stamp
+    if reload:
+        log.info("🔄 Models reloaded")
+
+
+def reload_models() -> None:
+    """Swap in freshly trained models (long-running processes: the service, the API)."""
+    load_models(reload=True)
 
-TODAY = date.today()                                             # <<< NEW
 
-def _risk(prob: float) -> str:
-    if prob >= THRESHOLDS["HIGH"]:
-        return "HIGH"
-    if prob >= THRESHOLDS["MEDIUM"]:
-        return "MEDIUM"
-    return "LOW"
+def reload_if_changed() -> bool:
+    """Reload the models if training wrote new ones since they were loaded (e.g. a manual run)."""
+    if churn_bundle is None or _model_stamp() == _loaded_stamp:
+        return False
+    log.info("🆕 Newer models on disk than the ones in memory")
+    reload_models()
+    return True
 
 # ------------------------------------------------------------------
-def predict_single(cg: dict) -> dict:
-    """
-    Predict churn and tenure for a single caregiver.
-    """
+# Batch building blocks – every function takes a whole chunk of rows
+
+def _column(X_raw: pd.DataFrame, name: str) -> np.ndarray:
+    """Numeric column as floats (missing column → zeros)."""
+    if name not in X_raw:
+        return np.zeros(len(X_raw))
+    return pd.to_numeric(X_raw[name], errors="coerce").to_numpy(dtype=float)
 
-    # ---------- 1 · BASIC FEATURES ----------
-    X_raw = pd.DataFrame([cg])
 
-    tenure_days = cg.get("tenure_days", 0)
-    X_raw["leave_ratio"]   = (
-        cg.get("total_leave_days", 0) / tenure_days if tenure_days > 0 else 0
-    )
-    X_raw["is_active_2025"] = 1 if cg.get("days_worked_2025", 0) > 0 else 0
+def _basic_features(X_raw: pd.DataFrame) -> pd.DataFrame:
+    """Add the derived columns the preprocessors expect."""
+    X_raw  = X_raw.copy()
+    tenure = _column(X_raw, "tenure_days")
+    leave  = _column(X_raw, "total_leave_days")
+    worked = _column(X_raw, "days_worked_2025")
 
-    # ---------- 2 · CHURN ----------
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X_raw["leave_ratio"] = np.where(tenure > 0, leave / np.where(tenure > 0, tenure, 1), 0.0)
+    X_raw["is_active_2025"] = (worked > 0).astype(int)
+    X_raw["tenure_days"]    = tenure
+    return X_raw
+
+
+def _explained(fn, n: int, what: str) -> np.ndarray:
+    """Driver texts from `fn`; an explanation failure never fails the scoring."""
     try:
-        X_churn = churn_bundle["pre"].transform(X_raw)
-        X_churn = X_churn.toarray() if issparse(X_churn) else X_churn.values
-        prob        = float(churn_bundle["model"].predict_proba(X_churn)[0, 1])
+        return fn()
     except Exception as e:
-        print(f"❌ Churn prediction error for {cg.get('caregiver_id','?')}: {e}")
-        prob = 0.0
+        log.warning("⚠️ %s drivers unavailable for this chunk: %s", what, e)
+        return np.full(n, None, dtype=object)
+
 
-    risk_level = _risk(prob)
+def _churn(X_raw: pd.DataFrame, explain_risk: bool = False) -> dict:
+    """{"prob": churn probabilities[, "drivers": texts for the HIGH/MEDIUM rows]}."""
+    # both the sklearn GBM and the serving trees take the CSR matrix as is
+    X_churn = churn_bundle["pre"].transform(X_raw)
+    model = churn_bundle["model"]
+    if not explain_risk:
+        return {"prob": model.predict_proba(X_churn)[:, 1]}
 
-    # --- PRESENTATION SCALE -------------------------------------
-    prob_pct = round(prob * 100, 3)              # 0–100 with 3 dp
-    # -------------------------------------------------------------
+    # one tree walk serves both the probabilities and the contributions
+    leaves = model.apply(X_churn)
+    prob = model.predict_proba(X_churn, leaves=leaves)[:, 1]
+    rows = np.flatnonzero(risk_levels(prob) != "LOW")
+    drivers = np.full(len(prob), None, dtype=object)
+    if len(rows):
+        drivers[rows] = _explained(
+            lambda: explain.churn_drivers(churn_bundle, X_churn[rows], leaves[rows]), len(rows), "Churn")
+    return {"prob": prob, "drivers": drivers}
 
-        # ---------- 3 · TENURE ----------
+
+def _tenure(X_raw: pd.DataFrame, explain_risk: bool = False) -> dict:
+    """{"total": estimated total tenure[, "drivers": texts]} for every row given."""
+    X_tenure = tenure_bundle["pre"].transform(X_raw)
+    if "meta" in tenure_bundle:
+        # serving bundle: sparse linear predictor, no DataFrame
+        out = {"total": tenure_bundle["model"].predict_median(X_tenure)}
+        if explain_risk:
+            out["drivers"] = _explained(
+                lambda: explain.tenure_drivers(tenure_bundle, X_tenure), len(X_raw), "Tenure")
+        return out
+
+    # pickled lifelines model needs a dense, named DataFrame
+    X_tenure = X_tenure.toarray() if issparse(X_tenure) else np.asarray(X_tenure)
+    try:
+        feat_names = tenure_bundle["pre"].get_feature_names_out()
+    except AttributeError:
+        feat_names = [f"f_{i}" for i in range(X_tenure.shape[1])]
+
+    # lifelines may return Series, DataFrame *or* scalar
+    pred = tenure_bundle["model"].predict_median(pd.DataFrame(X_tenure, columns=feat_names))
+    return {"total": np.asarray(pred, dtype=float).reshape(-1)}
+
+
+def _per_chunk(fn, X_raw: pd.DataFrame, defaults: dict, what: str) -> dict:
+    """
+    Run `fn` on the whole chunk; if that fails, retry row by row so one bad
+    row only costs its own results (`defaults`) instead of the whole chunk.
+    """
     try:
-        X_tenure = tenure_bundle["pre"].transform(X_raw)
-        X_tenure = X_tenure.toarray() if issparse(X_tenure) else X_tenure.values
+        return fn(X_raw)
+    except Exception:
+        out = {k: np.full(len(X_raw), v, dtype=object if v is None else float)
+               for k, v in defaults.items()}
+        for i in range(len(X_raw)):
+            try:
+                res = fn(X_raw.iloc[[i]])
+                for k in res:
+                    out[k][i] = res[k][0]
+            except Exception as e:
+                log.error("❌ %s prediction error for %s: %s",
+                          what, X_raw.iloc[i].get("caregiver_id", "?"), e)
+        return out
+
+
+def score_raw(df: pd.DataFrame, tenure_for_all: bool = False, explain_risk: bool = True) -> pd.DataFrame:
+    """
+    Score a chunk of caregivers and return the raw, un-bucketed results:
+    caregiver_id, churn_prob (0–1) and remaining_days.
+
+    Churn runs first for the whole chunk; the tenure model then only runs
+    for rows that are HIGH/MEDIUM under the current thresholds, because
+    LOW rows show "-" anyway. Their remaining_days stay NaN unless
+    `tenure_for_all` is set. With `explain_risk` (and serving bundles)
+    the HIGH/MEDIUM rows also get churn_drivers / tenure_drivers.
+    """
+    load_models()
+    X_raw  = _basic_features(df)
+    explaining = explain_risk and explain.available(churn_bundle) and explain.available(tenure_bundle)
+
+    # ---------- CHURN ----------
+    churn = _per_chunk(lambda X: _churn(X, explaining), X_raw,
+                       {"prob": 0.0, "drivers": None}, "Churn")
+    probs = np.asarray(churn["prob"], dtype=float)
 
+    # ---------- TENURE (risk-gated) ----------
+    at_risk = risk_levels(probs) != "LOW"
+    need = np.ones(len(X_raw), bool) if tenure_for_all else at_risk
+    remaining = np.full(len(X_raw), np.nan)
+    tenure_drivers = np.full(len(X_raw), None, dtype=object)
+    if need.any():
+        # with tenure_for_all the LOW rows get drivers too; finalize() shows "-" for them
+        remaining[need], drivers = _remaining(X_raw[need], explaining)
+        if explaining:
+            tenure_drivers[need] = drivers
+
+    ids = df["caregiver_id"] if "caregiver_id" in df else pd.Series("UNKNOWN", index=df.index)
+    raw = pd.DataFrame({
+        "caregiver_id":   ids.to_numpy(),
+        "churn_prob":     probs,
+        "remaining_days": remaining,
+    })
+    if explaining:
+        raw["churn_drivers"]  = churn["drivers"]
+        raw["tenure_drivers"] = tenure_drivers
+    return raw
+
+
+def _remaining(X_raw: pd.DataFrame, explain_risk: bool = False) -> tuple:
+    """(remaining_days, tenure drivers or None) for every row given."""
+    res = _per_chunk(lambda X: _tenure(X, explain_risk), X_raw,
+                     {"total": np.nan, "drivers": None}, "Tenure")
+    tenure = X_raw["tenure_days"].to_numpy(dtype=float)
+    est_total = np.asarray(res["total"], dtype=float)
+    with np.errstate(invalid="ignore"):
+        invalid = ~np.isfinite(est_total) | (est_total <= 0)
+    est_total = np.where(invalid, tenure + 365, est_total)      # fallback
+    return remaining_days(est_total, tenure), res.get("drivers")
+
+
+def _score_raw_rows(chunk: pd.DataFrame, first_row: int, tenure_for_all: bool,
+                    explain_risk: bool = True) -> pd.DataFrame:
+    """Row-by-row score_raw() for a chunk that failed as a whole."""
+    parts = []
+    for i in range(len(chunk)):
+        row = chunk.iloc[[i]]
         try:
-            feat_names = tenure_bundle["pre"].get_feature_names_out()
-        except AttributeError:
-            feat_names = [f"f_{i}" for i in range(X_tenure.shape[1])]
+            parts.append(score_raw(row, tenure_for_all, explain_risk))
+        except Exception as e:
+            log.error("❌ row %d: %s", first_row + i, e)
+            parts.append(pd.DataFrame({
+                "caregiver_id":   [row.iloc[0].get("caregiver_id", f"ERROR_{first_row + i}")],
+                "churn_prob":     [np.nan],
+                "remaining_days": [np.nan],
+                "error":          [str(e)],
+            }))
+    return pd.concat(parts, ignore_index=True)
 
-        # lifelines may return Series *or* scalar
-        pred = tenure_bundle["model"].predict_median(
-            pd.DataFrame(X_tenure, columns=feat_names)
-        )
+# ------------------------------------------------------------------
+# Input validation
+def validate_rows(df: pd.DataFrame) -> Validation:
+    """Check `df` against the input rules and the models' category values."""
+    load_models()
+    return check(df, vocabulary(churn_bundle["pre"]))
 
-        if isinstance(pred, (pd.Series, pd.DataFrame)):
-            est_total = float(pred.iloc[0])
-        else:                          # numpy.float64 or plain float
-            est_total = float(pred)
 
-        if not np.isfinite(est_total) or est_total <= 0:
-            raise ValueError("invalid est_total")
+def _with_rejected(raw: pd.DataFrame, df: pd.DataFrame, validation: Validation) -> pd.DataFrame:
+    """Put the rejected rows back into the scores, in input order, as error rows."""
+    rejected = np.flatnonzero(~validation.valid)
+    ids = (df["caregiver_id"].to_numpy()[rejected] if "caregiver_id" in df
+           else np.full(len(rejected), "UNKNOWN", dtype=object))
+    errors = pd.DataFrame({
+        "caregiver_id":   ids,
+        "churn_prob":     np.nan,
+        "remaining_days": np.nan,
+        "error":          "invalid input: " + validation.reasons[rejected],
+    })
+    order = np.concatenate([np.flatnonzero(validation.valid), rejected])
+    both = pd.concat([raw, errors], ignore_index=True)
+    return both.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+# ------------------------------------------------------------------
+def predict_single(cg: dict, today: Optional[date] = None, tenure_for_all: bool = False) -> dict:
+    """
+    Predict churn and tenure for a single caregiver.
+    `today` is the reference date for the quit date (default: today).
+    Raises ValueError when the input fails validation.
+    """
+    df = pd.DataFrame([cg])
+    validation = validate_rows(df)
+    if not validation.valid[0]:
+        raise ValueError(f"invalid input: {validation.reasons[0]}")
+    raw = score_raw(df, tenure_for_all)
+    return finalize(raw, today=today).iloc[0].to_dict()
+
+
+def _record_features(cg: dict) -> dict:
+    """_basic_features() for one dict."""
+    num = lambda name: np.nan if cg.get(name) is None else float(cg[name])
+    tenure, leave, worked = num("tenure_days"), num("total_leave_days"), num("days_worked_2025")
+    return {**cg,
+            "leave_ratio":    leave / tenure if tenure > 0 else 0.0,
+            "is_active_2025": int(worked > 0),
+            "tenure_days":    tenure}
 
-    except Exception as e:
-        print(f"❌ Tenure prediction error for {cg.get('caregiver_id','?')}: {e}")
-        est_total = tenure_days + 365  # fallback
-
-
-    # ---------- 4 · REMAINING DAYS ----------
-    remaining = max(est_total - tenure_days, 0.0)
-    if not np.isfinite(remaining) or remaining > 36500:
-        remaining = 365
-
-    # ---------- 5 · PRESENTATION RULE ----------  # <<< NEW BLOCK
-    if (risk_level == "LOW") or (remaining < 0.5):
-        days_to_quit_est    = "-"      
-        estimated_quit_date = "-"
-    else:
-        days_to_quit_est    = int(math.ceil(remaining))  # 0.4 → 1
-        estimated_quit_date = (TODAY + timedelta(days=days_to_quit_est)).isoformat()
-    # -----------------------------------------------------------
-
-    return {
-        "caregiver_id":        cg.get("caregiver_id", "UNKNOWN"),
-        "churn_probability":   prob_pct,
-        "risk_level":          risk_level,
-        "days_to_quit_est":    days_to_quit_est,
-        "estimated_quit_date": estimated_quit_date,
-    }
+
+def predict_record(cg: dict, today: Optional[date] = None, tenure_for_all: bool = False) -> dict:
+    """
+    predict_single() without DataFrames, for the API: the dict is encoded
+    straight into a NumPy feature row for the serving bundles. Same result
+    as predict_single(), which it falls back to for pickled models.
+    Raises ValueError when the input fails validation.
+    """
+    load_models()
+    if "meta" not in churn_bundle or "meta" not in tenure_bundle:
+        return predict_single(cg, today, tenure_for_all)
+    problems = check_record(cg, vocabulary(churn_bundle["pre"]))
+    if problems:
+        raise ValueError(f"invalid input: {problems}")
+
+    rec = _record_features(cg)
+    explaining = explain.available(churn_bundle) and explain.available(tenure_bundle)
+    X_churn = churn_bundle["pre"].encode([rec])
+    leaves = churn_bundle["model"].apply(X_churn)
+    prob = churn_bundle["model"].predict_proba(X_churn, leaves=leaves)[:, 1]
+    at_risk = risk_levels(prob)[0] != "LOW"
+
+    remaining = np.array([np.nan])
+    drivers = {"churn_drivers": [None], "tenure_drivers": [None]}
+    if explaining and at_risk:
+        drivers["churn_drivers"] = _explained(
+            lambda: explain.churn_drivers(churn_bundle, X_churn, leaves), 1, "Churn")
+    if at_risk or tenure_for_all:
+        X_tenure = tenure_bundle["pre"].encode([rec])
+        est_total = tenure_bundle["model"].predict_median(X_tenure)
+        if not np.isfinite(est_total[0]) or est_total[0] <= 0:
+            est_total = np.array([rec["tenure_days"] + 365])                # fallback
+        remaining = remaining_days(est_total, [rec["tenure_days"]])
+        if explaining:
+            drivers["tenure_drivers"] = _explained(
+                lambda: explain.tenure_drivers(tenure_bundle, X_tenure), 1, "Tenure")
+
+    cols = present([cg.get("caregiver_id", "UNKNOWN")], prob, remaining,
+                   drivers=drivers if explaining else None, today=today)
+    return {k: v[0] for k, v in cols.items()}
 
 # ------------------------------------------------------------------
-# Bulk helper
-def predict_df(df: pd.DataFrame) -> pd.DataFrame:
+# Bulk helpers
+def score_df_raw(df: pd.DataFrame,
+                 progress: Optional[ProgressReporter] = None,
+                 chunk_size: int = 1000,
+                 tenure_for_all: bool = False,
+                 summary: Optional[dict] = None,
+                 explain_risk: bool = True,
+                 validation: Optional[Validation] = None,
+                 validate_input: bool = True) -> pd.DataFrame:
     """
-    Apply predict_single() to every row of a DataFrame and
-    return the combined results as a new DataFrame.
-    Keeps the old signature so batch_score.py continues to work.
+    Raw scores (see score_raw) for every row of a DataFrame.
+    The whole frame is validated first (pass `validation` if it was
+    already checked): rejected rows are not scored and come back as error
+    rows with their reasons. The rest is processed in chunks of
+    `chunk_size`; after each chunk the row count is reported to `progress`
+    and a pending cancel is honoured.
+    If a `summary` dict is given, the run's counts are added to it, plus a
+    drift report against the training data when the churn bundle has one.
     """
-    records = []
+    load_models()
+    if validation is None and validate_input:
+        validation = validate_rows(df)
+    rejected = validation.n_rejected if validation is not None else 0
+    source, df = df, (df[validation.valid] if rejected else df)
+    if rejected:
+        top = sorted(validation.counts.items(), key=lambda kv: -kv[1])[:3]
+        log.warning("⚠️ %d of %d rows rejected by input validation (%s)", rejected, len(source),
+                    ", ".join(f"{k} ×{v}" for k, v in top))
+
+    progress = progress or ProgressReporter()
+    reference = churn_bundle.get("meta", {}).get("drift") if summary is not None else None
+    monitor = DriftMonitor(reference) if reference else None
+    parts = []
     total = len(df)
-    print(f"🔮 Scoring {total} caregivers…")
+    log.info("🔮 Scoring %d caregivers…", total)
+    progress.stage("score", total, f"Scoring {total} caregivers")
 
-    for i, (_, row) in enumerate(df.iterrows(), start=1):
+    for start in range(0, total, chunk_size):
+        progress.check()
+        chunk = df.iloc[start:start + chunk_size]
+        if monitor:
+            monitor.update(chunk)
         try:
-            records.append(predict_single(row.to_dict()))
+            parts.append(score_raw(chunk, tenure_for_all, explain_risk))
         except Exception as e:
-            print(f"❌ row {i}: {e}")
-            records.append(
-                {
-                    "caregiver_id": row.get("caregiver_id", f"ERROR_{i}"),
-                    "churn_probability": np.nan,
-                    "risk_level": "ERROR",
-                    "days_to_quit_est": None,
-                    "estimated_quit_date": None,
-                    "error": str(e),
-                }
-            )
-
-        if i % 100 == 0 or i == total:
-            print(f"   …{i}/{total}")
-
-    return pd.DataFrame(records)
+            log.error("❌ chunk starting at row %d: %s – scoring row by row", start + 1, e)
+            parts.append(_score_raw_rows(chunk, start + 1, tenure_for_all, explain_risk))
+
+        done = min(start + chunk_size, total)
+        progress.advance(done, total)
+        log.debug("   …%d/%d", done, total)
+
+    log.info("   …%d/%d scored", total, total)
+    raw = (pd.concat(parts, ignore_index=True) if parts else
+           pd.DataFrame(columns=["caregiver_id", "churn_prob", "remaining_days"]))
+    if rejected:
+        raw = _with_rejected(raw, source, validation)
+
+    tenure_rows = int(raw["remaining_days"].notna().sum())
+    skipped = 1 - tenure_rows / total if total else 0.0
+    log.info("⏭️  Tenure model run for %d of %d caregivers (%.1f%% skipped as LOW risk)",
+             tenure_rows, total, skipped * 100)
+    if summary is not None:
+        summary.update({
+            "rows_scored":          total,
+            "tenure_evaluated":     tenure_rows,
+            "tenure_skipped_share": round(skipped, 4),
+            "tenure_for_all":       tenure_for_all,
+            "rows_rejected":        rejected,
+            "rejections":           validation.counts if rejected else {},
+        })
+        if monitor:
+            summary["drift"] = report = monitor.report()
+            log.info("📉 Drift: max PSI %.3f (%s)", report["max_psi"], report["max_psi_feature"])
+            if report["retrain"]:
+                log.warning("⚠️ Input drift above PSI %.2f in %s – retraining recommended",
+                            report["psi_retrain"], ", ".join(report["drifted"]))
+    return raw
+
+
+def predict_df(df: pd.DataFrame,
+               progress: Optional[ProgressReporter] = None,
+               chunk_size: int = 1000,
+               today: Optional[date] = None,
+               tenure_for_all: bool = False) -> pd.DataFrame:
+    """
+    Score every row of a DataFrame and return the prediction table
+    (caregiver_id, churn_probability, risk_level, days_to_quit_est,
+    estimated_quit_date). Keeps the old signature so batch_score.py
+    continues to work; `today` is the reference date for quit dates.
+    """
+    return finalize(score_df_raw(df, progress, chunk_size, tenure_for_all), today=today)
@@ -0,0 +1,239 @@
+# src/service.py
+"""
+Headless service mode: one long-running process instead of a fresh
+interpreter per run.
+
+    python main.py service
+
+The imports, the loaded models and the feature cache stay in memory
+between runs. Two jobs run on their own cron-style schedules
+(config.json "service", or the SCORE_SCHEDULE / RETRAIN_SCHEDULE
+environment variables):
+
+    score     fetch → prepare → score → alert, with the models already loaded
+              (reloaded first if a manual run trained new ones meanwhile)
+    retrain   fetch → prepare → train, then the new models are swapped in
+
+Schedules use the five cron fields "minute hour day month weekday" with
+*, lists, ranges and steps ("*/15 6-18 * * 1-5"), or @hourly / @daily /
+@weekly / @monthly.
+
+Runs never overlap. The jobs run one at a time in the service loop, and
+every run (including a manual main.py or GUI run) holds data/pipeline.lock. A
+job that finds the lock taken is skipped until its next slot. Jobs due
+in the same minute run in the order given, retrain first, so the score
+run uses the fresh models.
+"""
+import datetime as dt
+import os
+import pathlib
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from logger import get_logger
+
+log = get_logger(__name__)
+
+ROOT      = pathlib.Path(__file__).resolve().parents[1]
+LOCK_PATH = ROOT / "data" / "pipeline.lock"
+
+MAX_SLEEP = 60.0          # re-check the clock at least once a minute (sleep, clock changes)
+
+
+# ------------------------------------------------------------------
+# Cron expressions
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+            "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+_FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7)]
+
+
+def _parse_field(text: str, name: str, lo: int, hi: int) -> frozenset:
+    values = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if span == "*":
+            start, stop = lo, hi
+        elif "-" in span:
+            start, stop = (int(v) for v in span.split("-", 1))
+        else:
+            start = stop = int(span)
+            if step > 1:                     # "5/15" = from 5 to the end, every 15
+                stop = hi
+        if not (lo <= start <= stop <= hi) or step < 1:
+            raise ValueError(f"cron {name} field out of range: {part!r}")
+        values.update(range(start, stop + 1, step))
+    return frozenset(values)
+
+
+class Cron:
+    """A five-field cron schedule; next_after() gives the next matching minute."""
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        fields = _ALIASES.get(self.expr, self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {expr!r}")
+        try:
+            parsed = [_parse_field(f, *spec) for f, spec in zip(fields, _FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"invalid cron expression {expr!r}: {e}") from None
+        self.minute, self.hour, self.day, self.month, weekday = parsed
+        self.weekday = frozenset(d % 7 for d in weekday)          # 0 and 7 are both Sunday
+        # cron rule: when both day and weekday are restricted, either may match
+        self._any_day, self._any_weekday = fields[2] == "*", fields[4] == "*"
+
+    def _day_matches(self, t: dt.datetime) -> bool:
+        day, weekday = t.day in self.day, (t.weekday() + 1) % 7 in self.weekday
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def matches(self, t: dt.datetime) -> bool:
+        return (t.minute in self.minute and t.hour in self.hour
+                and t.month in self.month and self._day_matches(t))
+
+    def next_after(self, t: dt.datetime) -> dt.datetime:
+        """First matching minute strictly after `t`."""
+        t = t.replace(second=0, microsecond=0) + dt.timedelta(minutes=1)
+        limit = t + dt.timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.month:
+                t = (t.replace(day=1) + dt.timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + dt.timedelta(days=1)
+            elif t.hour not in self.hour:
+                t = t.replace(minute=0) + dt.timedelta(hours=1)
+            elif t.minute not in self.minute:
+                t += dt.timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron expression {self.expr!r} never matches")
+
+    def __repr__(self) -> str:
+        return f"Cron({self.expr!r})"
+
+
+# ------------------------------------------------------------------
+# Run lock (shared by the service and manual runs)
+class LockBusy(RuntimeError):
+    """Another pipeline run holds the lock."""
+
+
+# msvcrt locks byte ranges, and a locked byte can't be read by others: lock one
+# far past the "pid … since …" text so a busy lock can still say who holds it
+_WIN_LOCK_OFFSET = 1 << 20
+
+
+@contextmanager
+def pipeline_lock(path: pathlib.Path = LOCK_PATH):
+    """
+    Exclusive, non-blocking lock on `path` for the duration of one run.
+    The OS releases it when the process dies, so a crash never leaves a
+    stale lock behind. Raises LockBusy when another run holds it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+")
+    try:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(_WIN_LOCK_OFFSET)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            try:
+                f.seek(0)
+                holder = f.read().strip() or "another process"
+            except OSError:                  # busy is busy, even if the holder can't be read
+                holder = "another process"
+            raise LockBusy(f"pipeline is already running ({holder})") from None
+
+        f.seek(0)
+        f.truncate()
+        f.write(f"pid {os.getpid()} since {dt.datetime.now():%Y-%m-%d %H:%M:%S}")
+        f.flush()
+        try:
+            yield
+        finally:
+            f.seek(0)
+            f.truncate()
+            if os.name == "nt":
+                f.seek(_WIN_LOCK_OFFSET)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()                            # closing also drops the flock
+
+
+# ------------------------------------------------------------------
+@dataclass
+class Job:
+    name:     str
+    cron:     Cron
+    run:      Callable[[], bool]           # True on success
+    next_run: Optional[dt.datetime] = None
+    last:     dict = field(default_factory=dict)
+
+
+class Service:
+    """Runs `jobs` on their schedules until stop() (or SIGINT / SIGTERM)."""
+
+    def __init__(self, jobs: List[Job], lock_path: pathlib.Path = LOCK_PATH):
+        self.jobs = jobs
+        self.lock_path = lock_path
+        self._stop = threading.Event()
+
+    def stop(self, *_) -> None:
+        self._stop.set()
+
+    def run_job(self, job: Job) -> Optional[bool]:
+        """One run of `job` under the lock; None when skipped because the lock is taken."""
+        start = time.perf_counter()
+        try:
+            with pipeline_lock(self.lock_path):
+                log.info("▶️  Service: %s job started", job.name)
+                ok = bool(job.run())
+        except LockBusy as e:
+            log.warning("⏭️  Service: %s job skipped – %s", job.name, e)
+            ok = None
+        except Exception as e:
+            log.error("❌ Service: %s job failed: %s", job.name, e, exc_info=True)
+            ok = False
+        job.last = {"at": dt.datetime.now().isoformat(timespec="seconds"), "ok": ok,
+                    "seconds": round(time.perf_counter() - start, 1)}
+        if ok is not None:
+            log.info("%s Service: %s job %s in %.1fs", "✅" if ok else "❌", job.name,
+                     "finished" if ok else "failed", job.last["seconds"])
+        return ok
+
+    def run_forever(self) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        now = dt.datetime.now()
+        for job in self.jobs:
+            job.next_run = job.cron.next_after(now)
+            log.info("🗓️  Service: %s job on %r, next at %s", job.name, job.cron.expr, job.next_run)
+
+        while not self._stop.is_set():
+            now = dt.datetime.now()
+            due = [job for job in self.jobs if job.next_run <= now]
+            if not due:
+                wait = min(job.next_run for job in self.jobs) - now
+                self._stop.wait(min(max(wait.total_seconds(), 0.0), MAX_SLEEP))
+                continue
+            for job in due:                  # list order: retrain before score
+                if self._stop.is_set():
+                    break
+                self.run_job(job)
+                # a run that overran (or a machine that slept) doesn't trigger catch-up runs
+                job.next_run = job.cron.next_after(max(dt.datetime.now(), job.next_run))
+                log.info("🗓️  Service: next %s job at %s", job.name, job.next_run)
+        log.info("🛑 Service stopped")
@@ -0,0 +1,185 @@
+# src/sources.py
+"""
+Roster download from one or more Google Sheet tabs (one per branch).
+
+config.json "google_sheets" either names a single tab (sheet_id + gid) or
+lists several under "sources":
+
+    "sources": [{"name": "north", "sheet_id": "…", "gid": "0"},
+                {"name": "south", "sheet_id": "…", "gid": "1234"}]
+
+fetch_sources() downloads all tabs concurrently (a thread pool, one
+request per tab), checks that each one is a non-empty CSV with the
+identity and label columns training needs (a missing feature column is
+imputed later, like a missing value), tags its rows with a `source` column and writes the union
+as the processed CSV.
+
+Every tab that passes is also kept in data/sources/<name>.csv. The next
+download sends If-None-Match / If-Modified-Since from that copy, so an
+unchanged tab costs a 304. A tab that fails (network error, HTTP error,
+wrong columns) falls back to its last good copy and does not affect the
+other tabs. The run fails only when no tab is usable.
+
+The URL comes from SHEET_URL_TEMPLATE or "url_template", so the same
+code can run against a local HTTP stand-in:
+
+    SHEET_URL_TEMPLATE="http://127.0.0.1:8765/{sheet_id}/{gid}.csv"
+"""
+import datetime as dt
+import io
+import json
+import os
+import pathlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pandas as pd
+import requests
+
+from logger import get_logger
+
+log = get_logger(__name__)
+
+ROOT       = pathlib.Path(__file__).resolve().parents[1]
+CACHE_DIR  = ROOT / "data" / "sources"
+URL_TEMPLATE = "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+MAX_WORKERS  = 8
+REQUIRED_COLUMNS = ["caregiver_id", "churn_label", "tenure_days"]   # other columns: validate_rows()
+SOURCE_COL   = "source"
+
+
+@dataclass
+class Source:
+    name:     str
+    sheet_id: str
+    gid:      str
+
+
+@dataclass
+class Fetched:
+    source:  Source
+    status:  str                      # "fresh", "unchanged", "cached" (stale fallback) or "failed"
+    frame:   Optional[pd.DataFrame] = None
+    error:   str = ""
+    seconds: float = 0.0
+
+
+def parse_sources(cfg: dict) -> List[Source]:
+    """Sources from the "google_sheets" config block (the single sheet_id/gid when there is no list)."""
+    entries = cfg.get("sources") or [{"name": "main", "sheet_id": cfg["sheet_id"], "gid": cfg.get("gid", "0")}]
+    sources = []
+    for i, entry in enumerate(entries):
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(entry.get("name") or f"sheet{i + 1}"))
+        sources.append(Source(name, str(entry.get("sheet_id", cfg.get("sheet_id"))), str(entry.get("gid", "0"))))
+    names = [s.name for s in sources]
+    if len(set(names)) != len(names):
+        raise ValueError(f"source names must be unique: {names}")
+    return sources
+
+
+# ------------------------------------------------------------------
+def _check(content: bytes) -> pd.DataFrame:
+    """Parse one tab; ValueError unless it is a non-empty roster CSV."""
+    if not content.strip():
+        raise ValueError("empty download")
+    try:
+        df = pd.read_csv(io.BytesIO(content))
+    except Exception as e:
+        raise ValueError(f"not a CSV ({e})") from None
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+    if df.empty:
+        raise ValueError("no rows")
+    return df
+
+
+def _fetch_one(source: Source, template: str, timeout: float, cache_dir: pathlib.Path) -> Fetched:
+    start = time.perf_counter()
+    cached_csv, cached_meta = cache_dir / f"{source.name}.csv", cache_dir / f"{source.name}.json"
+    try:
+        meta = json.loads(cached_meta.read_text()) if cached_csv.exists() and cached_meta.exists() else {}
+        if not isinstance(meta, dict):
+            raise ValueError("not a JSON object")
+    except (OSError, ValueError) as e:        # unreadable cache: fetch as if there were none
+        log.warning("⚠️ Source %s: ignoring unreadable cache metadata (%s)", source.name, e)
+        meta = {}
+    headers = {k: v for k, v in [("If-None-Match", meta.get("etag")),
+                                 ("If-Modified-Since", meta.get("last_modified"))] if v}
+
+    def done(status: str, frame: Optional[pd.DataFrame] = None, error: str = "") -> Fetched:
+        return Fetched(source, status, frame, error, time.perf_counter() - start)
+
+    try:
+        url = template.format(sheet_id=source.sheet_id, gid=source.gid)
+        response = requests.get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and meta:
+            return done("unchanged", pd.read_csv(cached_csv))
+        response.raise_for_status()
+        frame = _check(response.content)
+    except (requests.RequestException, ValueError) as e:
+        if not meta:
+            return done("failed", error=str(e))
+        # failure isolation: the last good copy of this tab stands in
+        log.warning("⚠️ Source %s: %s – using the copy from %s", source.name, e, meta.get("fetched_at"))
+        return done("cached", pd.read_csv(cached_csv), error=str(e))
+
+    try:
+        tmp = cached_csv.with_suffix(".tmp")
+        tmp.write_bytes(response.content)
+        tmp.replace(cached_csv)
+        tmp = cached_meta.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({
+            "etag":          response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at":    dt.datetime.now().isoformat(timespec="seconds"),
+            "rows":          len(frame),
+        }))
+        tmp.replace(cached_meta)
+    except OSError as e:                      # the download is good; only the next 304 is lost
+        log.warning("⚠️ Source %s: could not update the cache: %s", source.name, e)
+    return done("fresh", frame)
+
+
+def _fetch_isolated(source: Source, template: str, timeout: float, cache_dir: pathlib.Path) -> Fetched:
+    """_fetch_one(), but anything unexpected (e.g. a corrupt cached CSV) only fails this tab."""
+    try:
+        return _fetch_one(source, template, timeout, cache_dir)
+    except Exception as e:
+        return Fetched(source, "failed", error=f"{type(e).__name__}: {e}")
+
+
+def fetch_sources(sources: List[Source], out_path: pathlib.Path, template: Optional[str] = None,
+                  timeout: float = 30, max_workers: int = MAX_WORKERS,
+                  cache_dir: pathlib.Path = CACHE_DIR) -> List[Fetched]:
+    """
+    Download every source concurrently and write the union (with a
+    `source` column) to `out_path`. Returns one Fetched per source; the
+    output is only written when at least one source is usable.
+    """
+    template = os.getenv("SHEET_URL_TEMPLATE") or template or URL_TEMPLATE
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+        results = list(pool.map(lambda s: _fetch_isolated(s, template, timeout, cache_dir), sources))
+
+    for r in results:
+        if r.status == "failed":
+            log.error("❌ Source %s failed: %s", r.source.name, r.error)
+        else:
+            log.info("📥 Source %s: %d rows (%s, %.2fs)", r.source.name, len(r.frame), r.status, r.seconds)
+
+    usable = [r for r in results if r.frame is not None]
+    if not usable:
+        return results
+    union = pd.concat([r.frame.assign(**{SOURCE_COL: r.source.name}) for r in usable], ignore_index=True)
+    dupes = union["caregiver_id"].duplicated().sum()
+    if dupes:
+        log.warning("⚠️ %d caregiver_id values appear in more than one row across the sources", dupes)
+
+    tmp = out_path.with_suffix(".tmp")
+    union.to_csv(tmp, index=False)
+    tmp.replace(out_path)
+    return results
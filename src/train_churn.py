@@ -1,31 +1,50 @@
 # src/train_churn.py
-import joblib, pathlib, json
+import joblib, pathlib, json, numpy as np, pandas as pd
+from typing import Optional
+from sklearn.base import clone
 from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.metrics import roc_auc_score, classification_report
-from data_prep import load, clean, make_preprocessor, TARGET
+from feature_cache import load_features
+from logger import get_logger, configure_logging
+from progress import ProgressReporter
+from bundle import export_churn_bundle
+from tune import tuned_params
+from profiling import profiled
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
-DATA = ROOT / "data" / "Caregiver Prediction - Processed_Data.csv"
 MODEL_DIR = ROOT / "models"
 MODEL_DIR.mkdir(exist_ok=True)
 
-def train_churn_model():
-    try:
-        # Convert DATA (Path object) to a string using str() before passing it to load()
-        df = clean(load(str(DATA)))
+log = get_logger(__name__)
 
-        X = df.drop(columns=[TARGET, "caregiver_id"])
-        y = df[TARGET]
+N_FOLDS = 5
 
-        pre = make_preprocessor()
-        X_pre = pre.fit_transform(X)
+@profiled("train_churn")
+def train_churn_model(progress: Optional[ProgressReporter] = None):
+    progress = progress or ProgressReporter()
+    try:
+        # cleaned + encoded features, shared with the tenure model via the cache
+        fs = load_features()
+        pre, X_pre = fs.pre, fs.X
+        y = pd.Series(fs.churn_label)
 
-        # model
-        clf = GradientBoostingClassifier(random_state=42)
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-        auc = cross_val_score(clf, X_pre, y, cv=cv, scoring="roc_auc")
-        print(f"5-fold AUC: {auc.mean():.3f} ± {auc.std():.3f}")
+        # model – CV folds are run one by one so a cancel lands between fits
+        params = tuned_params("churn")            # models/tuned_params.json, if tune.py ran
+        if params:
+            log.info("🔧 Using tuned GBM parameters: %s", params)
+        clf = GradientBoostingClassifier(random_state=42, **params)
+        cv = StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=42)
+        progress.stage("train_churn", N_FOLDS + 1, "Cross-validating churn model")
+        auc = []
+        for fold, (train_idx, test_idx) in enumerate(cv.split(X_pre, y), start=1):
+            progress.check()
+            fold_clf = clone(clf).fit(X_pre[train_idx], y.iloc[train_idx])
+            auc.append(roc_auc_score(y.iloc[test_idx], fold_clf.predict_proba(X_pre[test_idx])[:, 1]))
+            progress.advance(fold, N_FOLDS + 1)
+        auc = np.array(auc)
+        log.info("%d-fold AUC: %.3f ± %.3f", N_FOLDS, auc.mean(), auc.std())
+        progress.check()
 
         # final fit + hold-out
         X_train, X_test, y_train, y_test = train_test_split(
@@ -33,22 +52,26 @@ def train_churn_model():
         )
         clf.fit(X_train, y_train)
         preds = clf.predict_proba(X_test)[:, 1]
-        print(classification_report(y_test, preds > 0.5, digits=3))
-        print("Hold-out AUC:", roc_auc_score(y_test, preds))
+        log.info("\n%s", classification_report(y_test, preds > 0.5, digits=3))
+        log.info("Hold-out AUC: %.4f", roc_auc_score(y_test, preds))
+        progress.advance(N_FOLDS + 1, N_FOLDS + 1)
 
-        joblib.dump({"model": clf, "pre": pre, "features": X.columns.tolist()},
+        # bundle first: it is only written when it scores like clf (ValueError otherwise)
+        export_churn_bundle(clf, pre, MODEL_DIR / "churn_serving", X_test, drift=fs.reference)
+        joblib.dump({"model": clf, "pre": pre, "features": fs.raw_columns},
                     MODEL_DIR / "churn_model.joblib")
         
-        print("✅ Churn model training completed successfully")
+        log.info("✅ Churn model training completed successfully")
         return True
         
     except Exception as e:
-        print(f"❌ Error in churn model training: {e}")
+        log.error("❌ Error in churn model training: %s", e)
         return False
 
 if __name__ == "__main__":
+    configure_logging()
     success = train_churn_model()
     if success:
-        print("✅ Churn model saved successfully")
+        log.info("✅ Churn model saved successfully")
     else:
-        print("❌ Churn model training failed")
+        log.error("❌ Churn model training failed")
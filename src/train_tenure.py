@@ -1,89 +1,129 @@
 # src/train_tenure.py
 import joblib, pathlib, numpy as np, pandas as pd
 from lifelines import CoxPHFitter
-from data_prep import load, clean, make_preprocessor, TENURE_TARGET
-from scipy.sparse import issparse
+from data_prep import TENURE_TARGET
+from feature_cache import load_features
+from scipy.sparse import csr_matrix
+from typing import Optional
+from logger import get_logger, configure_logging
+from progress import ProgressReporter
+from bundle import export_tenure_bundle
+from tune import COX_DEFAULT, tuned_params
+from profiling import profiled
 
 ROOT      = pathlib.Path(__file__).resolve().parents[1]
-DATA      = ROOT / "data" / "Caregiver Prediction - Processed_Data.csv"
 MODEL_DIR = ROOT / "models"
 MODEL_DIR.mkdir(exist_ok=True)
 
-# ------------------------------------------------------------------
-def train_tenure_model():
-    try:
-        df = clean(load(str(DATA)))
+log = get_logger(__name__)
 
-        # ---------- SURVIVAL LABELS ----------
-        df["event"] = df["churn_label"].astype(int)                   # 1 = quit, 0 = censored
-        df["log_current_tenure"] = np.log1p(df["tenure_days"])        # <<< NEW feature
+# ------------------------------------------------------------------
+def _column_stats(X: csr_matrix):
+    """Column means, sample variances and the covariance matrix of a sparse matrix."""
+    n, p = X.shape
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    cov = (np.asarray((X.T @ X).todense()) - n * np.outer(mean, mean)) / (n - 1)
+
+    # variances from centred values (implicit zeros included) – the cross
+    # product above loses precision for constant columns with large values
+    Xc = X.tocsc()
+    nnz = np.diff(Xc.indptr)
+    col = np.repeat(np.arange(p), nnz)
+    dev = Xc.data - mean[col]
+    var = (np.bincount(col, weights=dev ** 2, minlength=p) + (n - nnz) * mean ** 2) / (n - 1)
+    return mean, var, cov
+
+
+def _prune_columns(X: csr_matrix, feature_names: np.ndarray) -> np.ndarray:
+    """
+    Indices of the columns to keep: drop near-constant columns, then, of
+    every pair correlated above 0.95, the later column. Works on X.T @ X
+    (features × features), so the one-hot matrix is never densified.
+    """
+    _, var, cov = _column_stats(X)
+
+    # remove near-constant
+    low_var = var < 1e-10
+    if low_var.any():
+        log.info("Removing low-variance: %s", list(feature_names[low_var]))
+
+    # remove highly correlated (among the remaining columns)
+    std = np.sqrt(np.where(low_var, np.nan, var))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.abs(cov / np.outer(std, std))
+    later = np.triu(np.nan_to_num(corr) > 0.95, k=1)      # a before b, corr(a, b) > .95
+    high_corr = later.any(axis=0) & ~low_var
+    if high_corr.any():
+        log.info("Removing high corr: %s", list(feature_names[high_corr]))
+
+    return np.flatnonzero(~low_var & ~high_corr)
 
-        surv_df = df.dropna(subset=["event"]).copy()
+# ------------------------------------------------------------------
+TENURE_STEPS = 4    # features, clean-up, Cox fit, save
 
+@profiled("train_tenure")
+def train_tenure_model(progress: Optional[ProgressReporter] = None):
+    progress = progress or ProgressReporter()
+    try:
+        progress.stage("train_tenure", TENURE_STEPS, "Training tenure model")
         # ---------- FEATURES ----------
-        base_features = surv_df.drop(
-            columns=["caregiver_id", "churn_label", TENURE_TARGET, "event"]
-        )
+        # same cleaned rows and fitted preprocessor as the churn model (cached);
+        # clean() already dropped rows without a churn label
+        fs = load_features()
+        pre = fs.pre
 
-        pre = make_preprocessor()
-        pre.fit(base_features)
+        # one-hot output stays CSR until the pruned column set is known
+        X_sparse = fs.X
+        feature_names = fs.feature_names
+        progress.advance(1, TENURE_STEPS)
+        progress.check()
 
-        X = pre.transform(base_features)
-        if issparse(X):
-            X = X.toarray()
+        # ---------- LOW-VARIANCE + MULTICOLLINEARITY CLEAN-UP ----------
+        keep = _prune_columns(X_sparse, feature_names)
 
-        feature_names = pre.get_feature_names_out()
-        X = pd.DataFrame(X, columns=feature_names, index=surv_df.index)
+        # only the surviving columns are densified for lifelines
+        X = pd.DataFrame(X_sparse[:, keep].toarray(), columns=feature_names[keep])
 
-        # append duration + event
-        X[TENURE_TARGET] = surv_df[TENURE_TARGET]
-        X["event"] = surv_df["event"]
+        # append duration + event (1 = quit, 0 = censored)
+        X[TENURE_TARGET] = fs.tenure_days
+        X["event"] = fs.churn_label
 
-        # ---------- LOW-VARIANCE + MULTICOLLINEARITY CLEAN-UP ----------
-        feat_cols = [c for c in X.columns if c not in (TENURE_TARGET, "event")]
-
-        # remove near-constant
-        low_var = [c for c in feat_cols if X[c].var() < 1e-10]
-        if low_var:
-            print("Removing low-variance:", low_var)
-            X.drop(columns=low_var, inplace=True)
-
-        # remove highly correlated
-        corr = X[feat_cols].corr().abs()
-        high_corr = [
-            b
-            for a in corr.columns
-            for b in corr.index
-            if a != b and corr.loc[a, b] > 0.95 and b not in feat_cols[: feat_cols.index(a)]
-        ]
-        if high_corr:
-            print("Removing high corr:", high_corr)
-            X.drop(columns=high_corr, inplace=True)
+        progress.advance(2, TENURE_STEPS)
+        progress.check()
 
         # ---------- FIT COXPH ----------
-        cph = CoxPHFitter(penalizer=1.0, l1_ratio=0.3, alpha=0.95)
+        params = {**COX_DEFAULT, **tuned_params("tenure")}
+        log.info("🔧 Cox penalizer=%s, l1_ratio=%s", params["penalizer"], params["l1_ratio"])
+        cph = CoxPHFitter(alpha=0.95, **params)
         cph.fit(X, duration_col=TENURE_TARGET, event_col="event")
 
-        print(cph.summary.head())
+        log.debug("\n%s", cph.summary.head())
+
+        progress.advance(3, TENURE_STEPS)
+        progress.check()
 
         # ---------- SANITY CHECK ----------
         med_pred = cph.predict_median(X.drop(columns=[TENURE_TARGET, "event"]).head(5))
-        print("Sample medians:", med_pred.values)
+        log.info("Sample medians: %s", med_pred.values)
 
         # ---------- SAVE ----------
+        # bundle first: it is only written when it scores like cph (ValueError otherwise)
+        export_tenure_bundle(cph, pre, MODEL_DIR / "tenure_serving", X_sparse)
         joblib.dump({"model": cph, "pre": pre}, MODEL_DIR / "tenure_model.joblib")
-        print("✅ tenure_model.joblib saved")
+        log.info("✅ tenure_model.joblib and tenure_serving/ saved")
+        progress.advance(TENURE_STEPS, TENURE_STEPS)
         
         return True
         
     except Exception as e:
-        print(f"❌ Error in tenure model training: {e}")
+        log.error("❌ Error in tenure model training: %s", e)
         return False
 
 # ------------------------------------------------------------------
 if __name__ == "__main__":
+    configure_logging()
     success = train_tenure_model()
     if success:
-        print("✅ Tenure model saved successfully")
+        log.info("✅ Tenure model saved successfully")
     else:
-        print("❌ Tenure model training failed")
\ No newline at end of file
+        log.error("❌ Tenure model training failed")
\ No newline at end of file
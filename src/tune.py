@@ -0,0 +1,299 @@
+# src/tune.py
+"""
+Hyper-parameter tuning for both models, written to models/tuned_params.json
+and picked up by the next train_churn / train_tenure run.
+
+    python src/tune.py --budget 900 --seed 42 --jobs -1
+
+* churn: HalvingRandomSearchCV over the GradientBoostingClassifier
+  settings, scored by ROC AUC with stratified CV
+* tenure: penalizer × l1_ratio sweep of the Cox model, fitted in
+  parallel and scored by concordance on a held-out split
+
+Every candidate works on the same cached feature matrix (feature_cache).
+Both searches are sized up front from one timed reference fit and their
+share of the budget: the GBM candidate count (at least GBM_FACTOR² so
+halving always has rounds to drop candidates in) and one of COX_GRIDS.
+Once sized, a search always runs to the end – a run that takes longer
+than planned logs a warning but never changes which points count. The
+sizes used are saved; pass them back with --candidates / --cox-points to
+repeat a run exactly on another machine.
+
+Tuned settings are only saved when they beat the defaults: the default
+GBM is scored in the same CV as the winner, and the default Cox penalty
+is a point of every grid.
+"""
+import argparse
+import datetime as dt
+import json
+import math
+import os
+import pathlib
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from lifelines import CoxPHFitter
+from lifelines.utils import concordance_index
+from scipy.stats import loguniform, randint, uniform
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (HalvingRandomSearchCV, StratifiedKFold, cross_val_score,
+                                     train_test_split)
+
+from data_prep import TENURE_TARGET
+from feature_cache import load_features
+from logger import get_logger, configure_logging
+
+log = get_logger(__name__)
+
+ROOT        = pathlib.Path(__file__).resolve().parents[1]
+MODEL_DIR   = ROOT / "models"
+TUNED_PARAMS = MODEL_DIR / "tuned_params.json"
+
+GBM_SPACE = {
+    "n_estimators":     randint(50, 400),
+    "learning_rate":    loguniform(0.01, 0.3),
+    "max_depth":        randint(2, 6),
+    "subsample":        uniform(0.6, 0.4),
+    "min_samples_leaf": randint(1, 50),
+}
+COX_DEFAULT = {"penalizer": 1.0, "l1_ratio": 0.3}       # train_tenure's settings without tuning
+COX_GRIDS = [                                           # penalizers × l1 ratios, each holds the default
+    ([0.1, 1.0],                       [0.0, 0.3]),
+    ([0.03, 0.1, 0.3, 1.0],            [0.0, 0.3, 0.5]),
+    ([0.01, 0.03, 0.1, 0.3, 1.0, 3.0], [0.0, 0.1, 0.3, 0.5]),
+]
+
+GBM_FACTOR    = 3          # successive halving: keep the best third each round
+GBM_CV        = 3
+GBM_SHARE     = 0.7        # part of the budget for the GBM search
+GBM_MIN_ROWS  = 300        # smallest round – keeps both classes in every CV fold
+
+
+# ------------------------------------------------------------------
+# Reading the result (used by the training scripts)
+def tuned_params(model: str, path: pathlib.Path = TUNED_PARAMS) -> dict:
+    """Saved best parameters for "churn" or "tenure" ({} when not tuned yet)."""
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text()).get(model, {}).get("params", {})
+    except (ValueError, OSError) as e:
+        log.warning("⚠️ Ignoring unreadable %s: %s", path.name, e)
+        return {}
+
+
+# ------------------------------------------------------------------
+# Churn – successive halving
+def _min_resources(n_candidates: int, n_samples: int) -> int:
+    """Rows in the first round: enough for the last round to use all rows, never below GBM_MIN_ROWS."""
+    rounds = 1 + int(math.floor(math.log(n_candidates, GBM_FACTOR) + 1e-9))
+    return min(max(GBM_MIN_ROWS, n_samples // GBM_FACTOR ** (rounds - 1)), n_samples)
+
+
+def _halving_cost(n_candidates: int, n_samples: int) -> float:
+    """Fits of a halving search as sklearn schedules it, in units of one fit on all rows."""
+    r = _min_resources(n_candidates, n_samples)
+    required = 1 + int(math.floor(math.log(n_candidates, GBM_FACTOR) + 1e-9))
+    possible = 1 + int(math.floor(math.log(n_samples // r, GBM_FACTOR) + 1e-9))
+    return sum(math.ceil(n_candidates / GBM_FACTOR ** i) * min(r * GBM_FACTOR ** i, n_samples)
+               for i in range(min(required, possible))) / n_samples
+
+
+def _workers(n_jobs: int) -> int:
+    """Parallel workers for `n_jobs` (-1 = all cores), never more than there are cores."""
+    cores = os.cpu_count() or 1
+    return cores if n_jobs < 0 else max(1, min(n_jobs, cores))
+
+
+def _fit_candidates(X, y, seed: int, budget: float, n_jobs: int, candidates: int) -> int:
+    """
+    Largest candidate count ≤ `candidates` whose estimated run time fits
+    `budget`, from one timed default fit – but never fewer than GBM_FACTOR²,
+    below which successive halving has nothing to halve.
+    """
+    t0 = time.perf_counter()
+    GradientBoostingClassifier(random_state=seed).fit(X, y)
+    ref = time.perf_counter() - t0          # one default (100-tree) fit on all rows
+    ref *= GBM_SPACE["n_estimators"].mean() / 100
+
+    workers = _workers(n_jobs)
+    # the search, then the winner and the defaults once more on all rows
+    estimate = lambda n: ref * GBM_CV * (_halving_cost(n, len(y)) + 2) / workers
+    floor = min(candidates, GBM_FACTOR ** 2)
+    while candidates > floor and estimate(candidates) > budget:
+        candidates = max(floor, math.ceil(candidates / 2))
+    log.info("⏱️  GBM reference fit %.2fs → %d candidates (≈%.0fs on %d workers)",
+             ref, candidates, estimate(candidates), workers)
+    if estimate(candidates) > budget:
+        log.warning("⚠️ Even %d GBM candidates need ≈%.0fs of a %.0fs share – the search will overrun",
+                    candidates, estimate(candidates), budget)
+    return candidates
+
+
+def tune_churn(fs, seed: int, budget: float, n_jobs: int, candidates: Optional[int] = None,
+               max_candidates: int = 64) -> dict:
+    """
+    Halving search over GBM_SPACE; the winner is kept only if it beats the
+    default settings in the same CV (otherwise params is {}).
+    """
+    X, y = fs.X, fs.churn_label
+    start = time.perf_counter()
+    if candidates is None:
+        candidates = _fit_candidates(X, y, seed, budget, n_jobs, max_candidates)
+
+    cv = StratifiedKFold(n_splits=GBM_CV, shuffle=True, random_state=seed)
+    search = HalvingRandomSearchCV(
+        GradientBoostingClassifier(random_state=seed),
+        GBM_SPACE,
+        n_candidates=candidates,
+        factor=GBM_FACTOR,
+        min_resources=_min_resources(candidates, len(y)),
+        cv=cv,
+        scoring="roc_auc",
+        random_state=seed,
+        n_jobs=_workers(n_jobs),
+    )
+    search.fit(X, y)
+    best = {k: (v.item() if hasattr(v, "item") else v) for k, v in search.best_params_.items()}
+
+    # the last halving round may not use every row – score both on all rows, same folds
+    auc = lambda params: float(np.mean(cross_val_score(
+        GradientBoostingClassifier(random_state=seed, **params), X, y, cv=cv,
+        scoring="roc_auc", n_jobs=_workers(n_jobs))))
+    tuned_auc, default_auc = auc(best), auc({})
+
+    seconds = time.perf_counter() - start
+    if seconds > budget:
+        log.warning("⚠️ GBM search took %.0fs, over its %.0fs share of the budget", seconds, budget)
+    result = {"cv_auc": round(tuned_auc, 5), "default_cv_auc": round(default_auc, 5),
+              "n_candidates": candidates, "n_rounds": int(search.n_iterations_)}
+    if tuned_auc <= default_auc:
+        log.warning("⚠️ Best GBM settings (AUC %.4f) do not beat the defaults (AUC %.4f) – keeping the defaults",
+                    tuned_auc, default_auc)
+        return {"params": {}, "best_params": best, **result}
+    log.info("🏆 Churn: AUC %.4f with %s (defaults %.4f)", tuned_auc, best, default_auc)
+    return {"params": best, **result}
+
+
+# ------------------------------------------------------------------
+# Tenure – penalizer / l1_ratio sweep
+def _cox_point(train: pd.DataFrame, valid: pd.DataFrame, penalizer: float, l1_ratio: float) -> Optional[dict]:
+    """Fit one sweep point and score it; None when it failed."""
+    try:
+        cph = CoxPHFitter(penalizer=penalizer, l1_ratio=l1_ratio, alpha=0.95)
+        cph.fit(train, duration_col=TENURE_TARGET, event_col="event")
+        risk = cph.predict_partial_hazard(valid).to_numpy()
+        c = concordance_index(valid[TENURE_TARGET], -risk, valid["event"])
+    except Exception as e:              # convergence failures lose the point – the same on every run
+        log.warning("⚠️ Cox penalizer=%s l1_ratio=%s failed: %s", penalizer, l1_ratio, e)
+        return None
+    return {"penalizer": penalizer, "l1_ratio": l1_ratio, "concordance": float(c)}
+
+
+def _grid(penalizers: list, l1_ratios: list) -> list:
+    return [(p, l1) for p in penalizers for l1 in l1_ratios]
+
+
+def tune_tenure(fs, seed: int, budget: float, n_jobs: int, points: Optional[int] = None) -> dict:
+    """
+    Penalizer × l1_ratio sweep over the largest of COX_GRIDS whose estimated
+    time (from the default point, fitted first) fits `budget` – or the grid
+    with `points` points. The chosen grid always runs in full.
+    """
+    from train_tenure import _prune_columns          # same column set as training
+
+    keep = _prune_columns(fs.X, fs.feature_names)
+    data = pd.DataFrame(fs.X[:, keep].toarray(), columns=fs.feature_names[keep])
+    data[TENURE_TARGET] = fs.tenure_days
+    data["event"] = fs.churn_label
+    train, valid = train_test_split(data, test_size=0.25, stratify=data["event"],
+                                    random_state=seed)
+
+    start = time.perf_counter()
+    default = _cox_point(train, valid, COX_DEFAULT["penalizer"], COX_DEFAULT["l1_ratio"])
+    ref = time.perf_counter() - start
+    workers = _workers(n_jobs)
+    sizes = [len(_grid(*g)) for g in COX_GRIDS]
+    if points is None:
+        fits = [g for g, n in enumerate(sizes) if ref * (n - 1) / workers <= budget - ref]
+        chosen = fits[-1] if fits else 0
+    elif points in sizes:
+        chosen = sizes.index(points)
+    else:
+        raise ValueError(f"--cox-points must be one of {sizes}")
+    grid = _grid(*COX_GRIDS[chosen])
+    log.info("⏱️  Cox reference fit %.2fs → %d-point grid (≈%.0fs on %d workers)",
+             ref, len(grid), ref * len(grid) / workers, workers)
+
+    rest = [pt for pt in grid if pt != (COX_DEFAULT["penalizer"], COX_DEFAULT["l1_ratio"])]
+    results = [default] + Parallel(n_jobs=workers)(
+        delayed(_cox_point)(train, valid, p, l1) for p, l1 in rest
+    )
+    seconds = time.perf_counter() - start
+    if seconds > budget:
+        log.warning("⚠️ Cox sweep took %.0fs, over its %.0fs share of the budget", seconds, budget)
+
+    scored = [r for r in results if r is not None]
+    if not scored:
+        log.warning("⚠️ No Cox sweep point converged – keeping the default penalizer")
+        return {"params": {}, "n_points": len(grid), "n_scored": 0}
+
+    # ties → the stronger penalty, which generalises more conservatively
+    best = max(scored, key=lambda r: (round(r["concordance"], 6), r["penalizer"], r["l1_ratio"]))
+    log.info("🏆 Tenure: concordance %.4f with penalizer=%s, l1_ratio=%s",
+             best["concordance"], best["penalizer"], best["l1_ratio"])
+    params = {"penalizer": best["penalizer"], "l1_ratio": best["l1_ratio"]}
+    return {"params": {} if params == COX_DEFAULT else params,
+            "concordance": round(best["concordance"], 5),
+            "n_points": len(grid), "n_scored": len(scored), "sweep": scored}
+
+
+# ------------------------------------------------------------------
+def tune(budget: float = 900, seed: int = 42, n_jobs: int = -1, candidates: Optional[int] = None,
+         cox_points: Optional[int] = None, path: pathlib.Path = TUNED_PARAMS) -> dict:
+    """Tune both models, sized for `budget` seconds, and save the winners to `path`."""
+    start = time.time()
+    fs = load_features()
+    log.info("🔧 Tuning on %d rows × %d features (budget %ds, seed %d)",
+             fs.X.shape[0], fs.X.shape[1], budget, seed)
+
+    churn = tune_churn(fs, seed, budget * GBM_SHARE, n_jobs, candidates)
+    tenure = tune_tenure(fs, seed, budget * (1 - GBM_SHARE), n_jobs, cox_points)
+
+    result = {
+        "created":  dt.datetime.now().isoformat(timespec="seconds"),
+        "seed":     seed,
+        "data_key": fs.key,
+        "seconds":  round(time.time() - start, 1),
+        "churn":    churn,
+        "tenure":   tenure,
+    }
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(result, indent=2))
+    tmp.replace(path)
+    log.info("✅ Tuned parameters saved to %s (%.0fs)", path.name, result["seconds"])
+    if result["seconds"] > budget:
+        log.warning("⚠️ Tuning took %.0fs of a %.0fs budget", result["seconds"], budget)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the churn and tenure models")
+    parser.add_argument("--budget", type=float, default=900,
+                        help="time budget in seconds (sizes both searches up front)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=-1,
+                        help="parallel workers (-1 = all cores; capped at the core count)")
+    parser.add_argument("--candidates", type=int,
+                        help="GBM candidates (default: sized from the budget, max 64)")
+    parser.add_argument("--cox-points", type=int, choices=[len(_grid(*g)) for g in COX_GRIDS],
+                        help="Cox grid size (default: sized from the budget)")
+    args = parser.parse_args()
+
+    configure_logging()
+    tune(args.budget, args.seed, args.jobs, args.candidates, args.cox_points)
@@ -0,0 +1,157 @@
+# src/validate.py
+"""
+Input validation for whole batches of caregivers.
+
+check() tests every row of a DataFrame at once against RULES – type,
+range, whole numbers where the column is a count – and against the
+category values the models were trained on (vocabulary() reads them from
+the loaded preprocessor). check_record() applies the same rules to a
+single dict, for the API's one-caregiver requests. Missing numeric values
+are fine (the models impute them); a value that is there but wrong is not.
+
+Rows that fail are left out of scoring and listed with their reasons:
+
+    source_row  caregiver_id  …input columns…  rejection_reasons
+    17          WC-0016       …                age 140 > 100; unknown home_province 'P99'
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# column: (kind, min, max, required)   kind: "int" | "float" | "cat"
+# "int" only for true counts; day and age figures may have fractions.
+# Ranges are only set where they hold whatever scale a roster uses;
+# everything else is checked for its type (and categories) only.
+RULES = {
+    "tenure_days":          ("float", 0,    None, True),
+    "age":                  ("float", None, 100,  False),
+    "waiting_days":         ("float", None, None, False),
+    "total_leave_days":     ("float", None, None, False),     # half-day leave is real
+    "days_worked_2025":     ("float", None, None, False),
+    "work_ratio_2025":      ("float", None, None, False),
+    "rank":                 ("int",   None, None, False),
+    "competency_score":     ("float", None, None, False),
+    "positive_feedback":    ("int",   None, None, False),
+    "incidents":            ("int",   None, None, False),
+    "avg_income_per_shift": ("float", None, None, False),
+    "salary_band":          ("cat",   None, None, False),
+    "age_band":             ("cat",   None, None, False),
+    "home_province":        ("cat",   None, None, False),
+}
+
+
+@dataclass
+class Validation:
+    valid:   np.ndarray                         # bool per input row
+    reasons: np.ndarray                         # "; "-joined problems, "" for valid rows
+    counts:  dict = field(default_factory=dict)  # problem → number of rows
+
+    @property
+    def n_rejected(self) -> int:
+        return int((~self.valid).sum())
+
+    def report(self, df: pd.DataFrame) -> pd.DataFrame:
+        """The rejected input rows (1-based source_row) with their reasons."""
+        rows = np.flatnonzero(~self.valid)
+        out = df.iloc[rows].copy()
+        out.insert(0, "source_row", rows + 1)
+        out["rejection_reasons"] = self.reasons[rows]
+        return out.reset_index(drop=True)
+
+
+def vocabulary(pre) -> dict:
+    """Category values per input column the preprocessor was fitted with."""
+    if hasattr(pre, "categories"):                       # bundle.ServingPreprocessor
+        return {col: list(cats) for col, cats in zip(pre.cat_cols, pre.categories)}
+    _, cat_proc, cat_cols = pre.transformers_[1]         # fitted make_preprocessor()
+    cats = cat_proc.named_steps["onehot"].categories_
+    return {col: np.asarray(c).tolist() for col, c in zip(cat_cols, cats)}
+
+
+def check(df: pd.DataFrame, vocab: dict) -> Validation:
+    """Validate every row of `df`; nothing is scored or modified."""
+    n = len(df)
+    reasons = np.full(n, "", dtype=object)
+    counts = {}
+
+    def flag(mask: np.ndarray, problem: str, describe) -> None:
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return
+        counts[problem] = len(rows)
+        # only the failing rows are formatted
+        texts = np.array([describe(i) for i in rows], dtype=object)
+        reasons[rows] = np.where(reasons[rows] == "", texts, reasons[rows] + "; " + texts)
+
+    for col, (kind, lo, hi, required) in RULES.items():
+        if col not in df:
+            if required:
+                flag(np.ones(n, bool), f"{col}: column missing", lambda i: f"{col} column missing")
+            continue
+        values = df[col]
+        missing = values.isna().to_numpy()
+        if required:
+            flag(missing, f"{col}: missing", lambda i: f"{col} missing")
+
+        if kind == "cat":
+            if col in vocab:
+                unknown = ~missing & ~values.astype(str).isin(vocab[col]).to_numpy()
+                flag(unknown, f"{col}: unknown category",
+                     lambda i: f"unknown {col} {values.iat[i]!r}")
+            continue
+
+        x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        finite = np.isfinite(x)
+        flag(~missing & ~finite, f"{col}: not a number",
+             lambda i: f"{col} {values.iat[i]!r} is not a number")
+        if kind == "int":
+            flag(finite & (x != np.round(x)), f"{col}: not a whole number",
+                 lambda i: f"{col} {x[i]:g} is not a whole number")
+        if lo is not None:
+            flag(finite & (x < lo), f"{col}: below {lo}", lambda i: f"{col} {x[i]:g} < {lo}")
+        if hi is not None:
+            flag(finite & (x > hi), f"{col}: above {hi}", lambda i: f"{col} {x[i]:g} > {hi}")
+
+    return Validation(valid=reasons == "", reasons=reasons, counts=counts)
+
+
+def _number(value) -> float:
+    """pd.to_numeric(errors="coerce") for one value."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def check_record(record: dict, vocab: dict) -> str:
+    """check() for a single record (a dict): its "; "-joined problems, "" when valid."""
+    problems = []
+    for col, (kind, lo, hi, required) in RULES.items():
+        if col not in record:
+            if required:
+                problems.append(f"{col} column missing")
+            continue
+        value = record[col]
+        missing = value is None or (isinstance(value, float) and np.isnan(value))
+        if missing:
+            if required:
+                problems.append(f"{col} missing")
+            continue
+
+        if kind == "cat":
+            if col in vocab and str(value) not in vocab[col]:
+                problems.append(f"unknown {col} {value!r}")
+            continue
+
+        x = _number(value)
+        if not np.isfinite(x):
+            problems.append(f"{col} {value!r} is not a number")
+            continue
+        if kind == "int" and x != round(x):
+            problems.append(f"{col} {x:g} is not a whole number")
+        if lo is not None and x < lo:
+            problems.append(f"{col} {x:g} < {lo}")
+        if hi is not None and x > hi:
+            problems.append(f"{col} {x:g} > {hi}")
+    return "; ".join(problems)
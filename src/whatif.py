@@ -0,0 +1,144 @@
+# src/whatif.py
+"""
+Threshold what-if over the last batch run.
+
+generate_predictions() stores the raw churn probabilities and remaining-day
+estimates of the whole roster in data/score_store.npz (one array per
+column). rebucket() re-applies any HIGH/MEDIUM thresholds to those arrays –
+no preprocessing, no models – and returns the counts per risk level plus
+the alert list HR would receive.
+
+    python src/whatif.py --high 0.6 --medium 0.25
+"""
+import argparse
+import datetime as dt
+import json
+import pathlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from postprocess import finalize, risk_levels, thresholds
+
+ROOT       = pathlib.Path(__file__).resolve().parents[1]
+DATA_DIR   = ROOT / "data"
+STORE_PATH = DATA_DIR / "score_store.npz"
+
+_cache = {}          # path -> (mtime, arrays) so repeated calls skip the disk
+
+
+def save_store(raw: pd.DataFrame, source_df: pd.DataFrame, run_date: dt.date,
+               path: pathlib.Path = STORE_PATH) -> pathlib.Path:
+    """
+    Persist the raw scores of a run. `source_df` supplies churn_label so
+    the what-if alert list applies the same filter as the batch job.
+    """
+    labels = None
+    if {"caregiver_id", "churn_label"} <= set(source_df.columns):
+        labels = (source_df.drop_duplicates("caregiver_id")
+                  .set_index("caregiver_id")["churn_label"].reindex(raw["caregiver_id"]))
+    churn_label = (np.full(len(raw), -1, np.int8) if labels is None
+                   else labels.fillna(-1).to_numpy().astype(np.int8))
+    error = raw["error"].notna().to_numpy() if "error" in raw else np.zeros(len(raw), bool)
+
+    path.parent.mkdir(exist_ok=True)
+    with open(path, "wb") as f:            # file handle: np.savez won't append ".npz"
+        np.savez(
+            f,
+            caregiver_id=raw["caregiver_id"].astype(str).to_numpy(dtype=str),
+            churn_prob=raw["churn_prob"].to_numpy(dtype=float),
+            remaining_days=raw["remaining_days"].to_numpy(dtype=float),
+            churn_label=churn_label,
+            error=error,
+            run_date=np.array(str(run_date)),
+        )
+    _cache.pop(path, None)
+    return path
+
+
+def load_store(path: pathlib.Path = STORE_PATH) -> dict:
+    """The stored arrays of the last run (cached until the file changes)."""
+    if not path.exists():
+        raise FileNotFoundError(f"No stored scores at {path} – run the batch scoring first")
+
+    mtime = path.stat().st_mtime
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with np.load(path, allow_pickle=False) as npz:
+            cached = (mtime, {k: npz[k] for k in npz.files})
+        _cache[path] = cached
+    return cached[1]
+
+
+def rebucket(high: Optional[float] = None,
+             medium: Optional[float] = None,
+             today: Optional[dt.date] = None,
+             limit: Optional[int] = None,
+             path: pathlib.Path = STORE_PATH) -> dict:
+    """
+    Risk-level counts and alert list for the stored roster under the given
+    thresholds (unset → config). Quit dates count from the stored run date
+    unless `today` is given; `limit` caps the number of alerts returned.
+    Caregivers that were LOW when scored have no stored remaining days (the
+    tenure model was skipped for them, unless that run used tenure_for_all).
+    If they are alerted here they show "-" and are counted in
+    `n_not_estimated`. ValueError when MEDIUM is above HIGH.
+    """
+    t = thresholds(high, medium)
+    store = load_store(path)
+
+    probs  = np.where(store["error"], np.nan, store["churn_prob"])
+    levels = risk_levels(probs, t["HIGH"], t["MEDIUM"])
+    names, counts = np.unique(levels, return_counts=True)
+
+    # same rule as batch_score.filter_predictions: drop HIGH caregivers who already left
+    alert = np.isin(levels, ["HIGH", "MEDIUM"]) & ~((store["churn_label"] == 1) & (levels == "HIGH"))
+    alerted = np.flatnonzero(alert)
+    not_estimated = int(np.isnan(store["remaining_days"][alerted]).sum())
+    idx = alerted[np.argsort(-store["churn_prob"][alerted], kind="stable")]
+    if limit is not None:
+        idx = idx[:limit]
+
+    raw = pd.DataFrame({
+        "caregiver_id":   store["caregiver_id"][idx],
+        "churn_prob":     store["churn_prob"][idx],
+        "remaining_days": store["remaining_days"][idx],
+    })
+    today = today or dt.date.fromisoformat(str(store["run_date"]))
+    alerts = finalize(raw, today=today, high=t["HIGH"], medium=t["MEDIUM"])
+
+    return {
+        "run_date":   str(store["run_date"]),
+        "thresholds": t,
+        "counts":     {str(k): int(v) for k, v in zip(names, counts)},
+        "n_alerts":   int(alert.sum()),
+        "n_not_estimated": not_estimated,
+        "alerts":     alerts.to_dict(orient="records"),
+    }
+
+
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-bucket the last run under new thresholds")
+    parser.add_argument("--high", type=float, help="HIGH threshold (0–1), default THRESHOLD_HIGH")
+    parser.add_argument("--medium", type=float, help="MEDIUM threshold (0–1), default THRESHOLD_MEDIUM")
+    parser.add_argument("--top", type=int, default=20, help="number of alerts to list")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+
+    result = rebucket(args.high, args.medium, limit=args.top)
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        print(f"Run {result['run_date']} – thresholds {result['thresholds']}")
+        for level in ("HIGH", "MEDIUM", "LOW", "ERROR"):
+            if level in result["counts"]:
+                print(f"  {level:<6} {result['counts'][level]}")
+        print(f"{result['n_alerts']} caregivers would be alerted; top {len(result['alerts'])}:")
+        if result["n_not_estimated"]:
+            print(f"  ({result['n_not_estimated']} of them were LOW when scored and have no quit "
+                  f"estimate – run with tenure_for_all to get one)")
+        for a in result["alerts"]:
+            print(f"- {a['caregiver_id']}: {a['churn_probability']:.2f}% "
+                  f"{a['risk_level']} ({a['days_to_quit_est']} days left)")
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import pathlib
+import sys
+
+# src/ modules import each other by their top-level names
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,67 @@
+# tests/test_bundle.py
+"""Serving bundles must score exactly like the fitted models they are exported from."""
+import numpy as np
+import pandas as pd
+import pytest
+from lifelines import CoxPHFitter
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from bundle import export_churn_bundle, export_tenure_bundle, load_bundle
+from data_prep import CAT_COLS, NUM_COLS, make_preprocessor
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """(raw rows, fitted preprocessor, encoded CSR, churn label, tenure days) of a synthetic roster."""
+    rng = np.random.default_rng(7)
+    n = 400
+    df = pd.DataFrame({c: rng.gamma(2.0, 50.0, n).round() for c in NUM_COLS})
+    df["is_active_2025"] = rng.integers(0, 2, n)
+    df["leave_ratio"] = rng.random(n)
+    for c in CAT_COLS:
+        df[c] = rng.choice(["a", "b", "c"], n)
+    df.loc[rng.random(n) < 0.05, NUM_COLS[0]] = np.nan          # imputed values too
+    df.loc[rng.random(n) < 0.05, CAT_COLS[0]] = np.nan
+
+    pre = make_preprocessor().fit(df)
+    X = pre.transform(df)
+    churn = (rng.random(n) < 0.2 + 0.5 * (df[NUM_COLS[1]] > 100)).astype(int).to_numpy()
+    tenure = rng.integers(30, 1500, n).astype(float)
+    return df, pre, X, churn, tenure
+
+
+def test_churn_bundle_matches_gbm(fitted, tmp_path):
+    df, pre, X, churn, _ = fitted
+    clf = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0).fit(X, churn)
+    bundle = load_bundle(export_churn_bundle(clf, pre, tmp_path / "churn", X))
+
+    X_served = bundle["pre"].transform(df)
+    assert np.array_equal(X_served.toarray(), X.toarray())
+    np.testing.assert_array_equal(bundle["model"].predict_proba(X_served), clf.predict_proba(X))
+
+
+def test_tenure_bundle_matches_cox(fitted, tmp_path):
+    df, pre, X, churn, tenure = fitted
+    names = pre.get_feature_names_out()
+    keep = np.arange(len(NUM_COLS) + 2)                 # numeric columns only, no collinear dummies
+    data = pd.DataFrame(X[:, keep].toarray(), columns=names[keep]).assign(T=tenure, E=churn)
+    cph = CoxPHFitter(penalizer=1.0, l1_ratio=0.3).fit(data, duration_col="T", event_col="E")
+    bundle = load_bundle(export_tenure_bundle(cph, pre, tmp_path / "tenure", X))
+
+    fitted_median = np.asarray(cph.predict_median(data.drop(columns=["T", "E"])), float).reshape(-1)
+    np.testing.assert_array_equal(bundle["model"].predict_median(bundle["pre"].transform(df)), fitted_median)
+
+
+def test_mismatch_is_not_exported(fitted, tmp_path):
+    _, pre, X, churn, _ = fitted
+    clf = GradientBoostingClassifier(n_estimators=5, random_state=0).fit(X, churn)
+    path = export_churn_bundle(clf, pre, tmp_path / "churn", X)
+    before = (path / "value.npy").read_bytes()
+
+    # a per-row init model cannot be flattened: the bundle keeps one constant init score
+    clf = GradientBoostingClassifier(n_estimators=5, random_state=0,
+                                     init=LogisticRegression(max_iter=1000)).fit(X, churn)
+    with pytest.raises(ValueError, match="does not reproduce"):
+        export_churn_bundle(clf, pre, path, X)
+    assert (path / "value.npy").read_bytes() == before          # previous bundle kept
@@ -0,0 +1,44 @@
+# tests/test_history.py
+"""The prediction history is append-only; readers see the latest run of each day."""
+import datetime as dt
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from history import record_run, trajectory, trend
+
+DAY = dt.date(2026, 10, 2)
+
+
+def _run(probs, levels, ids=("A", "B")):
+    raw = pd.DataFrame({"caregiver_id": list(ids), "churn_prob": probs,
+                        "remaining_days": [np.nan] * len(ids)})
+    return raw, pd.DataFrame({"risk_level": levels})
+
+
+def test_same_day_rerun_is_kept_and_latest_is_read(tmp_path):
+    path = tmp_path / "history.sqlite"
+    record_run(*_run([0.9, 0.1], ["HIGH", "LOW"]), DAY - dt.timedelta(days=1), path=path)
+    record_run(*_run([0.9, 0.1], ["HIGH", "LOW"]), DAY, path=path)
+    record_run(*_run([0.5, 0.8], ["MEDIUM", "HIGH"]), DAY, path=path)          # rerun
+
+    with closing(sqlite3.connect(path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == 6
+
+    a = trajectory("A", days=None, end=DAY, path=path)
+    assert a["churn_prob"].tolist() == [0.9, 0.5]
+    t = trend(days=None, end=DAY, path=path)
+    assert t["n_high"].tolist() == [1, 1] and t["n_medium"].tolist() == [0, 1]
+
+
+def test_aggregates_use_the_deduplicated_rows(tmp_path):
+    path = tmp_path / "history.sqlite"
+    raw, preds = _run([0.9, 0.5, 0.1], ["HIGH", "MEDIUM", "LOW"], ids=("A", "A", "B"))
+    assert record_run(raw, preds, DAY, path=path) == 2
+
+    row = trend(days=None, end=DAY, path=path).iloc[0]
+    assert (row["n_rows"], row["n_high"], row["n_medium"], row["n_low"]) == (2, 0, 1, 1)
+    assert row["mean_prob"] == 0.3
@@ -0,0 +1,79 @@
+# tests/test_risk_gate.py
+"""The tenure model only runs for HIGH/MEDIUM rows, and what-ifs say which alerts lack an estimate."""
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import score
+from whatif import rebucket, save_store
+
+
+class StubChurn:
+    """predict_proba straight from the `p` column."""
+
+    def transform(self, X_raw):
+        return X_raw[["p"]].to_numpy(dtype=float)
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - X[:, 0], X[:, 0]])
+
+
+class StubTenure:
+    """Total tenure = current tenure + 100 days; remembers how many rows it was asked for."""
+    rows = 0
+
+    def transform(self, X_raw):
+        return X_raw[["tenure_days"]].to_numpy(dtype=float)
+
+    def predict_median(self, X):
+        StubTenure.rows += len(X)
+        return X[:, 0] + 100
+
+
+@pytest.fixture
+def models(monkeypatch):
+    monkeypatch.setattr(score, "churn_bundle", {"pre": StubChurn(), "model": StubChurn(), "meta": {}})
+    monkeypatch.setattr(score, "tenure_bundle", {"pre": StubTenure(), "model": StubTenure(), "meta": {}})
+    StubTenure.rows = 0
+
+
+ROSTER = pd.DataFrame({"caregiver_id": ["A", "B", "C", "D"],
+                       "p":            [0.10, 0.50, 0.90, 0.20],     # LOW, MEDIUM, HIGH, LOW
+                       "tenure_days":  [10, 20, 30, 40]})
+
+
+def _score(tenure_for_all: bool = False, summary: dict = None) -> pd.DataFrame:
+    return score.score_df_raw(ROSTER, tenure_for_all=tenure_for_all, summary=summary,
+                              explain_risk=False, validate_input=False)
+
+
+def test_low_rows_skip_the_tenure_model(models):
+    summary = {}
+    raw = _score(summary=summary)
+    assert StubTenure.rows == 2
+    assert raw["remaining_days"].isna().tolist() == [True, False, False, True]
+    assert summary["tenure_evaluated"] == 2 and summary["tenure_skipped_share"] == 0.5
+
+
+def test_tenure_for_all_estimates_everyone(models):
+    summary = {}
+    raw = _score(tenure_for_all=True, summary=summary)
+    assert StubTenure.rows == 4
+    assert raw["remaining_days"].tolist() == [100, 100, 100, 100]
+    assert summary["tenure_evaluated"] == 4 and summary["tenure_skipped_share"] == 0.0
+
+
+def test_whatif_counts_alerts_without_an_estimate(models, tmp_path):
+    store = save_store(_score(), ROSTER, dt.date(2026, 10, 1), path=tmp_path / "store.npz")
+    assert StubTenure.rows == 2                       # storing the run scores nothing again
+
+    result = rebucket(high=0.4, medium=0.05, limit=None, path=store)
+    assert result["counts"] == {"HIGH": 2, "MEDIUM": 2}
+    assert result["n_alerts"] == 4 and result["n_not_estimated"] == 2
+    days = {a["caregiver_id"]: a["days_to_quit_est"] for a in result["alerts"]}
+    assert days["A"] == days["D"] == "-" and days["B"] == days["C"] == 100
+
+    with pytest.raises(ValueError, match="above HIGH"):
+        rebucket(high=0.2, medium=0.5, path=store)
@@ -0,0 +1,29 @@
+# tests/test_service.py
+"""pipeline_lock(): one run at a time, and a busy lock says who holds it."""
+import os
+
+import pytest
+
+from service import LockBusy, pipeline_lock
+
+
+def test_second_run_is_refused_while_the_first_holds_the_lock(tmp_path):
+    path = tmp_path / "pipeline.lock"
+    with pipeline_lock(path):
+        assert path.read_text().startswith(f"pid {os.getpid()} since ")
+        with pytest.raises(LockBusy, match=f"pid {os.getpid()}"):
+            with pipeline_lock(path):
+                pass
+
+    assert path.read_text() == ""                      # released and cleared
+    with pipeline_lock(path):                          # free again
+        pass
+
+
+def test_lock_is_released_when_the_run_fails(tmp_path):
+    path = tmp_path / "pipeline.lock"
+    with pytest.raises(ZeroDivisionError):
+        with pipeline_lock(path):
+            1 / 0
+    with pipeline_lock(path):
+        pass
@@ -0,0 +1,111 @@
+# tests/test_sources.py
+"""fetch_sources() against a local HTTP stand-in for the Google Sheets export."""
+import functools
+import json
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from sources import Source, fetch_sources
+
+ROSTER = """caregiver_id,tenure_days,age,incidents,home_province,churn_label
+{p}-1,100,30,0,P1,0
+{p}-2,250,41,2,P2,1
+"""
+
+
+class Sheets(SimpleHTTPRequestHandler):
+    broken: set = set()          # sheet ids that answer 500
+
+    def do_GET(self):
+        if self.path.split("/")[1] in self.broken:
+            self.send_error(500, "stand-in failure")
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sheets(tmp_path, monkeypatch):
+    """(directory served, url_template) of a running stand-in server."""
+    monkeypatch.delenv("SHEET_URL_TEMPLATE", raising=False)      # would override the template
+    root = tmp_path / "sheets"
+    root.mkdir()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Sheets, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield root, f"http://127.0.0.1:{server.server_port}/{{sheet_id}}/{{gid}}.csv"
+    server.shutdown()
+    Sheets.broken = set()
+
+
+def _publish(root, sheet_id: str, text: str) -> None:
+    (root / sheet_id).mkdir(exist_ok=True)
+    (root / sheet_id / "0.csv").write_text(text)
+
+
+def test_union_with_cached_fallback(sheets, tmp_path):
+    root, template = sheets
+    sources = [Source("north", "n", "0"), Source("south", "s", "0")]
+    _publish(root, "n", ROSTER.format(p="N"))
+    _publish(root, "s", ROSTER.format(p="S"))
+    out, cache = tmp_path / "union.csv", tmp_path / "cache"
+
+    first = fetch_sources(sources, out, template=template, cache_dir=cache)
+    assert [r.status for r in first] == ["fresh", "fresh"]
+    assert (cache / "south.csv").exists()
+
+    # south breaks: its last good copy stands in; north answers 304 from the cache
+    Sheets.broken = {"s"}
+    second = fetch_sources(sources, out, template=template, cache_dir=cache)
+    assert [r.status for r in second] == ["unchanged", "cached"]
+    assert "500" in second[1].error
+
+    union = pd.read_csv(out)
+    assert union.groupby("source").size().to_dict() == {"north": 2, "south": 2}
+    assert set(union.loc[union["source"] == "south", "caregiver_id"]) == {"S-1", "S-2"}
+
+
+def test_only_identity_and_label_columns_required(sheets, tmp_path):
+    root, template = sheets
+    _publish(root, "n", ROSTER.format(p="N"))
+    _publish(root, "x", "caregiver_id,age\nX-1,30\n")                 # no label, no tenure
+    _publish(root, "m", "caregiver_id,tenure_days,churn_label\nM-1,5,0\n")   # features missing
+    out = tmp_path / "union.csv"
+
+    results = fetch_sources([Source("north", "n", "0"), Source("bad", "x", "0"),
+                             Source("minimal", "m", "0")],
+                            out, template=template, cache_dir=tmp_path / "cache")
+    assert [r.status for r in results] == ["fresh", "failed", "fresh"]
+    assert "churn_label" in results[1].error
+
+    union = pd.read_csv(out)
+    assert list(union["source"]) == ["north", "north", "minimal"]
+    assert union.loc[union["source"] == "minimal", "age"].isna().all()     # imputed later
+
+
+def test_nothing_usable_writes_nothing(sheets, tmp_path):
+    _, template = sheets
+    out = tmp_path / "union.csv"
+    results = fetch_sources([Source("gone", "g", "0")], out, template=template,
+                            cache_dir=tmp_path / "cache")
+    assert results[0].status == "failed"
+    assert not out.exists()
+
+
+def test_corrupt_cache_metadata_only_affects_its_tab(sheets, tmp_path):
+    root, template = sheets
+    sources = [Source("north", "n", "0"), Source("south", "s", "0")]
+    _publish(root, "n", ROSTER.format(p="N"))
+    _publish(root, "s", ROSTER.format(p="S"))
+    out, cache = tmp_path / "union.csv", tmp_path / "cache"
+    fetch_sources(sources, out, template=template, cache_dir=cache)
+
+    (cache / "north.json").write_text('{"etag": "trunc')              # e.g. killed mid-write
+    results = fetch_sources(sources, out, template=template, cache_dir=cache)
+    assert [r.status for r in results] == ["fresh", "unchanged"]
+    assert json.loads((cache / "north.json").read_text())["rows"] == 2    # rewritten whole
+    assert not list(cache.glob("*.tmp"))
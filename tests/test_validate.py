@@ -0,0 +1,32 @@
+# tests/test_validate.py
+"""RULES: only the checks the manual lists, the same for batches and single records."""
+import pandas as pd
+import pytest
+
+from validate import check, check_record
+
+VOCAB = {"home_province": ["P1", "P2"]}
+GOOD = {"caregiver_id": "WC-1", "tenure_days": 200, "age": 35, "total_leave_days": 4,
+        "rank": 2, "incidents": 0, "positive_feedback": 3, "home_province": "P1"}
+
+
+@pytest.mark.parametrize("change, reason", [
+    ({}, ""),
+    ({"total_leave_days": 2.5, "waiting_days": 0.5, "age": 35.5}, ""),   # fractions of days / years
+    ({"waiting_days": 5000, "competency_score": 250}, ""),               # no invented upper bounds
+    ({"rank": 1.5}, "rank 1.5 is not a whole number"),
+    ({"incidents": "two"}, "incidents 'two' is not a number"),
+    ({"tenure_days": -1}, "tenure_days -1 < 0"),
+    ({"tenure_days": None}, "tenure_days missing"),
+    ({"age": 140}, "age 140 > 100"),
+    ({"home_province": "P99"}, "unknown home_province 'P99'"),
+])
+def test_rules(change, reason):
+    record = {**GOOD, **change}
+    assert check(pd.DataFrame([record]), VOCAB).reasons[0] == reason
+    assert check_record(record, VOCAB) == reason
+
+
+def test_missing_optional_columns_are_imputed_not_rejected():
+    v = check(pd.DataFrame([{"caregiver_id": "WC-2", "tenure_days": 10}]), VOCAB)
+    assert v.n_rejected == 0